@@ -0,0 +1,250 @@
+"""四个工作流页面热点路径的基准测试
+
+用合成数据测量：
+- 页面2 检查提醒：规则编译、冲突/遗漏检测、增量对话匹配、带缓存的 check_orders
+- 页面2 检索：索引构建、检索、排序后分页
+- 页面4 病历：字段提取 + format_medical_record
+- data_loader：冷加载（清空缓存）与热加载
+- 页面3 检验结果：异常判定、趋势统计
+- 页面1 相似病例检索
+
+结果写为 JSON（含提交号与环境信息），可用 --compare 与另一份结果比较。
+
+用法:
+    python benchmarks/run.py                       # 默认规模，结果写入 benchmarks/results.json
+    python benchmarks/run.py --scale large --out results-large.json
+    python benchmarks/run.py --compare baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "streamlit"
+
+SCALES = {
+    'small': {'orders': 2_000, 'conflicts': 200, 'missing_checks': 500, 'transcript': 2_000,
+              'cases': 2_000, 'lab_rows': 10_000},
+    'default': {'orders': 20_000, 'conflicts': 2_000, 'missing_checks': 5_000, 'transcript': 20_000,
+                'cases': 20_000, 'lab_rows': 100_000},
+    'large': {'orders': 100_000, 'conflicts': 10_000, 'missing_checks': 20_000, 'transcript': 100_000,
+              'cases': 100_000, 'lab_rows': 1_000_000},
+}
+
+SEARCH_QUERIES = ['血常规', 'crp', 'xcg', '过敏', '鼻', '不存在的项目']
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> Dict:
+    """运行 repeat 次，返回耗时统计（毫秒）；setup 不计入耗时"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(times), 4),
+        'median_ms': round(statistics.median(times), 4),
+        'mean_ms': round(statistics.fmean(times), 4),
+        'max_ms': round(max(times), 4),
+    }
+
+
+class Suite:
+    def __init__(self, repeat: int, only: Optional[str]):
+        self.repeat = repeat
+        self.only = only
+        self.results: List[Dict] = []
+
+    def bench(self, group: str, name: str, fn: Callable[[], object],
+              setup: Optional[Callable[[], object]] = None, repeat: Optional[int] = None, **params):
+        full_name = f"{group}.{name}"
+        if self.only and self.only not in full_name:
+            return
+        result = {'name': full_name, 'params': params, **measure(fn, repeat or self.repeat, setup)}
+        self.results.append(result)
+        print(f"{full_name:<45} median {result['median_ms']:>10.3f} ms  (min {result['min_ms']:.3f})")
+
+
+def bench_order_warnings(suite: Suite, data: Dict):
+    from utils.consult import ConsultSession
+    from utils.rule_engine import TranscriptMatcher, compile_rules
+    from utils.selection import SelectionState
+
+    rules_data = data['order_check_rules.json']
+    transcript = data['transcript.json']
+    rules = compile_rules(rules_data)
+    patient_text = ' '.join(m['text'] for m in transcript if m['role'] == '病人')
+    selected = SelectionState(o['order_name'] for o in data['orders_ranked.json'][:50])
+    n_rules = len(rules_data['conflicts']) + len(rules_data['missing_checks'])
+
+    suite.bench('order_warnings', 'compile_rules', lambda: compile_rules(rules_data), rules=n_rules)
+    suite.bench('order_warnings', 'check_full_text', lambda: rules.check(selected, patient_text),
+                rules=n_rules, text_chars=len(patient_text), selected=len(selected))
+
+    def feed_all():
+        TranscriptMatcher(rules).feed_many(transcript)
+    suite.bench('order_warnings', 'incremental_feed', feed_all, messages=len(transcript))
+
+    session = ConsultSession(rules)
+    session.ingest(transcript)
+    suite.bench('order_warnings', 'check_orders_cached', lambda: session.check_orders(selected),
+                selected=len(selected))
+
+
+def bench_order_search(suite: Suite, data: Dict):
+    from utils.order_search import OrderSearchIndex
+
+    orders = data['orders_ranked.json']
+    suite.bench('order_search', 'build_index', lambda: OrderSearchIndex(orders), repeat=3, orders=len(orders))
+    index = OrderSearchIndex(orders)
+    for query in SEARCH_QUERIES:
+        suite.bench('order_search', f"search[{query}]", lambda q=query: index.search(q)[:20],
+                    orders=len(orders))
+    suite.bench('order_search', 'browse_sorted_page', lambda: index.search('')[100:120], orders=len(orders))
+
+
+def bench_medical_record(suite: Suite, data: Dict):
+    from utils.medical_record import extract_transcript_fields, format_medical_record, generate_medical_record
+
+    patient = data['patient.json']
+    transcript = data['transcript.json']
+    selected = [o['order_name'] for o in data['orders_ranked.json'][:10]]
+    suite.bench('medical_record', 'extract_fields', lambda: extract_transcript_fields(transcript),
+                messages=len(transcript))
+    fields = generate_medical_record(patient, transcript, selected)['fields']
+    suite.bench('medical_record', 'format', lambda: format_medical_record(patient, **fields))
+    suite.bench('medical_record', 'generate', lambda: generate_medical_record(patient, transcript, selected),
+                messages=len(transcript))
+
+
+def bench_loaders(suite: Suite, data: Dict):
+    from utils import data_loader
+
+    loaders = {
+        'load_orders_ranked': data_loader.load_orders_ranked,
+        'load_compiled_rules': data_loader.load_compiled_rules,
+        'load_order_search_index': data_loader.load_order_search_index,
+        'load_transcript': data_loader.load_transcript,
+        'load_similar_cases': data_loader.load_similar_cases,
+        'load_lab_table': data_loader.load_lab_table,
+        'load_lab_results': data_loader.load_lab_results,
+    }
+    for name, loader in loaders.items():
+        suite.bench('loaders', f"{name}.cold", loader, setup=data_loader.clear_cache, repeat=3)
+        loader()
+        suite.bench('loaders', f"{name}.warm", loader)
+
+
+def bench_labs(suite: Suite, data: Dict):
+    from utils.abnormal_detection import classify, parse_references
+    from utils.lab_history import LabHistory
+    from utils.lab_store import LabTable
+
+    rows = data['lab_table.csv']
+    suite.bench('labs', 'from_rows', lambda: LabTable.from_rows(rows, 'P1'), repeat=3, rows=len(rows))
+    table = LabTable.from_rows(rows, 'P1')
+    suite.bench('labs', 'classify', lambda: classify(table['value'], table['low'], table['high'],
+                                                     table['positive'], table['expect_negative']),
+                rows=len(rows))
+    suite.bench('labs', 'parse_references', lambda: parse_references(table['reference']), rows=len(rows))
+    history = LabHistory(table)
+    items = history.analytes('P1')
+    suite.bench('labs', 'trend_panel', lambda: [history.summary('P1', item) for item in items],
+                analytes=len(items))
+
+
+def bench_similar_cases(suite: Suite, data: Dict, workdir: Path):
+    from utils.similarity_index import build_index
+
+    cases = data['similar_cases.json']
+    index = build_index(workdir / 'case_index', cases)
+    text = ' '.join(m['text'] for m in data['transcript.json'][1:200:2])
+    suite.bench('similar_cases', 'query', lambda: index.query(text, k=5), cases=len(cases))
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline_path: Path, threshold: float) -> int:
+    """与基线比较中位数，返回变慢超过阈值的条目数"""
+    baseline = {r['name']: r for r in json.loads(baseline_path.read_text(encoding='utf-8'))['results']}
+    regressions = 0
+    print(f"\n与 {baseline_path} 比较（阈值 {threshold:.0%}）:")
+    for result in results:
+        base = baseline.get(result['name'])
+        if not base or not base['median_ms']:
+            continue
+        ratio = result['median_ms'] / base['median_ms'] - 1
+        flag = ''
+        if ratio > threshold:
+            flag = '  <-- 变慢'
+            regressions += 1
+        print(f"{result['name']:<45} {ratio:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作流热点路径基准测试")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='default')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--only', help="只运行名称包含该字符串的条目")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=Path, default=Path(__file__).parent / 'results.json')
+    parser.add_argument('--compare', type=Path, help="基线结果 JSON")
+    parser.add_argument('--threshold', type=float, default=0.2, help="中位数变慢超过该比例视为回退")
+    args = parser.parse_args()
+
+    from synthetic import write_data_dir
+
+    with tempfile.TemporaryDirectory(prefix='doctor_manager_bench_') as tmp:
+        workdir = Path(tmp)
+        scale = SCALES[args.scale]
+        data = write_data_dir(workdir / 'data', APP_DIR / 'data', scale, seed=args.seed)
+
+        # data_loader 在导入时读取数据目录
+        os.environ['DOCTOR_MANAGER_DATA_DIR'] = str(workdir / 'data')
+        sys.path.insert(0, str(APP_DIR))
+
+        suite = Suite(args.repeat, args.only)
+        bench_order_warnings(suite, data)
+        bench_order_search(suite, data)
+        bench_medical_record(suite, data)
+        bench_loaders(suite, data)
+        bench_labs(suite, data)
+        bench_similar_cases(suite, data, workdir)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': {'name': args.scale, **scale},
+        'seed': args.seed,
+        'results': suite.results,
+    }
+    args.out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    print(f"\n结果已写入 {args.out}")
+
+    if args.compare:
+        sys.exit(1 if compare(suite.results, args.compare, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
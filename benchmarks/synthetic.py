@@ -0,0 +1,113 @@
+"""基准测试用的合成数据
+
+以 streamlit/data 中的示例为模板，按规模生成检查目录、长对话、规则文件、
+相似病例和检验结果表；同一随机种子生成的数据完全相同，便于跨提交比较。
+"""
+import csv
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+SYMPTOMS = ['打喷嚏', '鼻痒', '清水样鼻涕', '眼睛痒', '换季', '鼻塞', '头痛', '咳嗽', '发热', '咽痛',
+            '胸闷', '气短', '乏力', '流脓涕', '耳鸣', '嗅觉减退', '夜间加重', '晨起明显']
+EXAM_WORDS = ['血常规', 'C反应蛋白', '降钙素原', '过敏原', '鼻内镜', '鼻窦CT', '肺功能', '胸片',
+              '肝肾功能', '电解质', '凝血', '尿常规', '心电图', '甲状腺', '血糖', '血脂', '免疫球蛋白']
+LAB_ITEMS = [('白细胞计数', '10^9/L', '4.0-10.0'), ('中性粒细胞比例', '%', '50.0-70.0'),
+             ('嗜酸性粒细胞比例', '%', '0.5-5.0'), ('血清总IgE', 'IU/mL', '0.0-100.0'),
+             ('C反应蛋白', 'mg/L', '<5'), ('户尘螨', 'kUA/L', '阴性'), ('血红蛋白', 'g/L', '115-150')]
+
+
+def make_orders(n: int, rng: random.Random) -> List[Dict]:
+    orders = []
+    for i in range(n):
+        word = rng.choice(EXAM_WORDS)
+        orders.append({
+            'order': rng.randint(1, n),
+            'order_name': f"{word}{i}项",
+            'priority': rng.choice(['高', '中', '低']),
+            'reason': f"评估{rng.choice(SYMPTOMS)}相关{word}改变",
+            'tags': rng.sample(['过敏', '血液', '影像', '感染', '呼吸'], 2),
+        })
+    return orders
+
+
+def make_rules(orders: List[Dict], conflicts: int, missing: int, rng: random.Random) -> Dict:
+    names = [o['order_name'] for o in orders]
+    return {
+        'conflicts': [{
+            'group': f"冲突组{i}",
+            'items': rng.sample(names, 3),
+            'reason': "同类检查重复",
+            'suggestion': "建议保留其一",
+        } for i in range(conflicts)],
+        'missing_checks': [{
+            'symptom_keywords': rng.sample(SYMPTOMS, 3) + [f"症状{i}"],
+            'missing_item': rng.choice(names),
+            'reason': "症状提示需要该检查",
+            'priority': rng.choice(['高', '中', '低']),
+            'warning': "建议补充检查",
+        } for i in range(missing)],
+    }
+
+
+def make_transcript(n: int, rng: random.Random) -> List[Dict]:
+    transcript = []
+    for i in range(n):
+        if i % 2 == 0:
+            text = rng.choice(["最近哪里不舒服？", "以前有过敏史吗？", "持续多久了？", "还有别的症状吗？"])
+            transcript.append({'ts': f"09:{i // 60 % 60:02d}:{i % 60:02d}", 'role': '医生', 'text': text})
+        else:
+            text = f"最近{rng.choice(SYMPTOMS)}，还有点{rng.choice(SYMPTOMS)}，大概{rng.randint(1, 30)}天了。"
+            transcript.append({'ts': f"09:{i // 60 % 60:02d}:{i % 60:02d}", 'role': '病人', 'text': text})
+    return transcript
+
+
+def make_cases(n: int, template: Dict, rng: random.Random) -> List[Dict]:
+    cases = []
+    for i in range(n):
+        case = dict(template)
+        case['case_id'] = f"SYN-{i:06d}"
+        case['chief_complaint'] = f"{rng.choice(SYMPTOMS)}、{rng.choice(SYMPTOMS)}{rng.randint(1, 12)}个月"
+        case['history_present'] = "，".join(rng.sample(SYMPTOMS, 5))
+        cases.append(case)
+    return cases
+
+
+def make_lab_rows(n: int, rng: random.Random) -> List[Dict]:
+    rows = []
+    for i in range(n):
+        item, unit, reference = rng.choice(LAB_ITEMS)
+        result = rng.choice(['阴性', '2+', '4+']) if reference == '阴性' else f"{rng.uniform(0, 200):.2f}"
+        rows.append({'项目': item, '结果': result, '单位': unit, '参考范围': reference, '标记': '',
+                     '时间': f"20{10 + i % 14:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}"})
+    return rows
+
+
+def write_data_dir(path: Path, source: Path, scale: Dict[str, int], seed: int = 0) -> Dict[str, List]:
+    """在 path 下写出一套与 streamlit/data 同名的合成数据文件，返回生成的数据"""
+    rng = random.Random(seed)
+    path.mkdir(parents=True, exist_ok=True)
+    patient = json.loads((source / 'patient.json').read_text(encoding='utf-8'))
+    case_template = json.loads((source / 'similar_cases.json').read_text(encoding='utf-8'))[0]
+
+    orders = make_orders(scale['orders'], rng)
+    data = {
+        'patient.json': patient,
+        'orders_ranked.json': orders,
+        'order_check_rules.json': make_rules(orders, scale['conflicts'], scale['missing_checks'], rng),
+        'transcript.json': make_transcript(scale['transcript'], rng),
+        'similar_cases.json': make_cases(scale['cases'], case_template, rng),
+    }
+    for name in ('abnormal_summary.json', 'sidebar_support.json'):
+        data[name] = json.loads((source / name).read_text(encoding='utf-8'))
+    for name, value in data.items():
+        (path / name).write_text(json.dumps(value, ensure_ascii=False), encoding='utf-8')
+
+    lab_rows = make_lab_rows(scale['lab_rows'], rng)
+    with open(path / 'lab_table.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(lab_rows[0]))
+        writer.writeheader()
+        writer.writerows(lab_rows)
+    data['lab_table.csv'] = lab_rows
+    return data
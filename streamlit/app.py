@@ -1,16 +1,10 @@
 """页面1: 问诊 (录音文本 + 相似病例推荐) - Main App Entry"""
 import streamlit as st
-import sys
-from pathlib import Path
 
-# Adjust path if needed, though running from root usually works well for utils
-# sys.path.append(str(Path(__file__).parent.parent))
-
-from utils.data_loader import (
-    load_transcript,
-    load_similar_cases
-)
-from utils.ui_components import render_case_card
+from utils.data_loader import get_scoring_client, load_similar_cases, load_similarity_index
+from utils.profiling import profiled, render_profile_panel
+from utils.session import get_active_patient_id, get_consult_session
+from utils.ui_components import render_case_card, render_status_panel
 
 # 页面配置
 st.set_page_config(
@@ -20,28 +14,26 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-def render_page1():
-    """渲染问诊页面"""
-    
-    # === 状态指示区 ===
-    st.markdown(f"""
-    <div class="status-panel">
-        <div style="display: flex; align-items: center;">
-            <span class="recording-dot"></span>
-            <span style="font-weight: 600; color: #ff4b4b;">实时录音中...</span>
-        </div>
-        <div class="searching-text">
-            <span class="searching-dots"></span>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # === 对话摘要区 ===
+# 对话区轮询间隔（秒）
+TRANSCRIPT_REFRESH_SECONDS = 2
+
+
+def _case_query(consult) -> str:
+    """相似病例区的查询：有评分服务或检索索引时为病人陈述，否则为患者ID"""
+    if get_scoring_client() is not None or load_similarity_index() is not None:
+        return consult.patient_text()
+    return str(get_active_patient_id())
+
+
+@st.fragment(run_every=TRANSCRIPT_REFRESH_SECONDS)
+@profiled('页面1 对话摘要')
+def render_transcript_panel():
+    """对话摘要区：按固定间隔单独重跑，只接收新增对话"""
     st.subheader("对话摘要")
     st.caption("以下内容完全引用自原句要点")
     
-    # 加载对话数据（用于统计）
-    transcript = load_transcript()
+    # 接收新增对话（增量匹配结果与页面2共享）
+    consult = get_consult_session()
     
     # highlights = [
     #     "阵发性喷嚏，晨起及冷空气刺激后明显",
@@ -51,23 +43,36 @@ def render_page1():
     #     "既往无明确药物过敏史"
     # ]
     # 根据用户要求，显示最后5句对话
-    if transcript:
-        recent_dialogue = transcript[-5:]
+    if consult.message_count:
+        recent_dialogue = consult.recent(5)
         for item in recent_dialogue:
             st.markdown(f"{item['text']}")
     else:
         st.info("暂无对话记录")
     
-    # 统计信息
-    # st.markdown("<br>", unsafe_allow_html=True)
-    
-    # === 分隔线 ===
-    st.markdown("---")
-    
-    # === 下半部分: 相似病例区 (30% 高度) ===
+    # 新对话改变了病例查询时，重跑整页以刷新病例区
+    query = _case_query(consult)
+    if st.session_state.get('case_query') != query:
+        st.session_state['case_query'] = query
+        st.rerun()
+
+
+@st.fragment
+@profiled('页面1 相似病例')
+def render_case_panel(query: str):
+    """相似病例区：只在查询变化（整页重跑）时重建病例卡片"""
     st.subheader("相似病例")
     
-    cases = load_similar_cases()
+    # 已构建检索索引时按当前对话实时检索，否则使用预置的相似病例
+    def _local_cases():
+        index = load_similarity_index()
+        if index is not None:
+            return index.query(query, k=5)
+        return load_similar_cases(get_active_patient_id())
+    
+    # 配置了评分服务时由服务检索，服务不可用时回退到上次结果或本地检索
+    client = get_scoring_client()
+    cases = client.similar_cases(query, k=5, fallback=_local_cases) if client else _local_cases()
     if cases:
         # 一块是一行，横着铺开
         for idx, case in enumerate(cases):
@@ -78,6 +83,29 @@ def render_page1():
         st.info("暂无相似病例")
 
 
+@profiled('页面1 问诊')
+def render_page1():
+    """渲染问诊页面"""
+    
+    # === 状态指示区 ===
+    render_status_panel()
+    
+    # 整页运行时先确定病例查询，对话区不会因此再触发重跑
+    st.session_state['case_query'] = _case_query(get_consult_session())
+    
+    # === 对话摘要区（定时刷新）===
+    render_transcript_panel()
+    
+    # 统计信息
+    # st.markdown("<br>", unsafe_allow_html=True)
+    
+    # === 分隔线 ===
+    st.markdown("---")
+    
+    # === 下半部分: 相似病例区 (30% 高度) ===
+    render_case_panel(st.session_state['case_query'])
+
+
 @st.dialog("病例详情")
 def show_case_detail(case: dict):
     """显示病例详细信息的模态框"""
@@ -93,3 +121,4 @@ def show_case_detail(case: dict):
 
 if __name__ == "__main__":
     render_page1()
+    render_profile_panel()
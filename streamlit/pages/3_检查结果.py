@@ -1,14 +1,59 @@
-"""页面3: 检查结果 - 异常指标展示"""
+"""页面3: 检查结果 - 异常指标展示
+
+pandas 只在画趋势图和原始报告截图缺失时的备用表格中使用，用到时再导入。
+"""
 import streamlit as st
-import pandas as pd
-import sys
 from pathlib import Path
 
-sys.path.append(str(Path(__file__).parent.parent))
+from utils.data_loader import lab_patient_key, load_image, load_lab_history, load_lab_results
+from utils.profiling import profiled, render_profile_panel
+from utils.session import get_active_patient_id
+from utils.workflow import lab_trends
+
+# 截图展示宽度：两栏约 640 像素，整行约 1280 像素
+HALF_IMAGE_WIDTH = 640
+FULL_IMAGE_WIDTH = 1280
+# 趋势面板：统计最近几次结果、每行几个指标、折线图最多几个点
+TREND_LAST_N = 5
+TREND_COLUMNS = 4
+TREND_MAX_POINTS = 60
 
-from utils.data_loader import load_lab_table
 
+def render_lab_trends(patient_id):
+    """各指标最近结果、较上次就诊变化及历史趋势"""
+    history = load_lab_history(patient_id)
+    key = lab_patient_key(patient_id)
+    trends = lab_trends(history, key, TREND_LAST_N)
+    summaries = trends['summaries']
+    
+    if not summaries:
+        st.caption("暂无可统计的检验结果")
+        return
+    
+    for row_start in range(0, len(summaries), TREND_COLUMNS):
+        cols = st.columns(TREND_COLUMNS)
+        for col, summary in zip(cols, summaries[row_start:row_start + TREND_COLUMNS]):
+            with col:
+                delta = summary['delta']
+                st.metric(
+                    summary['item'],
+                    f"{summary['latest']:g} {summary['unit']}",
+                    delta=None if delta is None else f"{delta:+g}",
+                    delta_color="off",
+                    help=f"最近{summary['count']}次均值 {summary['mean']:.2f}，"
+                         f"范围 {summary['min']:g} ~ {summary['max']:g}"
+                )
+    
+    # 多次检验的指标显示趋势（按时间分段取均值，点数有上限）
+    if trends['trending']:
+        with st.expander("历史趋势"):
+            import pandas as pd
+            item = st.selectbox("指标", trends['trending'])
+            times, values = history.downsample(key, item, TREND_MAX_POINTS)
+            st.line_chart(pd.DataFrame({item: values}, index=pd.to_datetime(times)))
 
+
+@profiled('页面3 检查结果')
 def render_page3():
     """渲染检查结果页面"""
     
@@ -28,7 +73,7 @@ def render_page3():
     with col1:
         st.markdown("#### 嗜酸小板数目")
         if screenshot1.exists():
-            st.image(str(screenshot1), use_container_width=True)
+            st.image(str(load_image(screenshot1, HALF_IMAGE_WIDTH)), use_container_width=True)
         else:
             st.error("截图文件不存在")
         
@@ -49,7 +94,7 @@ def render_page3():
     with col2:
         st.markdown("#### 嗜酸板压积")
         if screenshot2.exists():
-            st.image(str(screenshot2), use_container_width=True)
+            st.image(str(load_image(screenshot2, HALF_IMAGE_WIDTH)), use_container_width=True)
         else:
             st.error("截图文件不存在")
         
@@ -70,6 +115,12 @@ def render_page3():
     
     st.markdown("---")
     
+    # === 中间部分: 指标趋势 ===
+    st.markdown("### 指标趋势")
+    render_lab_trends(get_active_patient_id())
+    
+    st.markdown("---")
+    
     # === 下半部分: 原始检查报告 ===
     st.markdown("### 原始检查报告")
     
@@ -77,28 +128,27 @@ def render_page3():
     original_report = data_dir / "Screenshot 2026-02-01 at 11.27.59.png"
     
     if original_report.exists():
-        st.image(str(original_report), use_container_width=True)
+        st.image(str(load_image(original_report, FULL_IMAGE_WIDTH)), use_container_width=True)
     else:
         st.warning("原始报告截图不存在，显示数据表格")
         
-        # 备用：显示数据表格
-        lab_data = load_lab_table()
+        # 备用：显示数据表格（只加载展示所需的列）
+        import numpy as np
+        import pandas as pd
+        from utils.lab_store import CSV_COLUMNS, FLAG_COLUMNS
+        lab = load_lab_results(get_active_patient_id(), tuple(CSV_COLUMNS.values()) + FLAG_COLUMNS)
         
-        if lab_data:
-            df = pd.DataFrame(lab_data)
-            
-            # 样式化表格
-            def highlight_abnormal(row):
-                """高亮异常值"""
-                if row.get('标记') == '↑':
-                    return ['background-color: #FFEBEE'] * len(row)
-                return [''] * len(row)
+        if len(lab):
+            df = pd.DataFrame({header: lab[name] for header, name in CSV_COLUMNS.items()})
+            df.insert(4, '标记', lab.flags())
+            df['时间'] = df['时间'].dt.strftime('%Y-%m-%d').fillna('')
             
-            if '标记' in df.columns:
-                styled_df = df.style.apply(highlight_abnormal, axis=1)
-                st.dataframe(styled_df, use_container_width=True, height=400)
-            else:
-                st.dataframe(df, use_container_width=True, height=400)
+            # 高亮异常行（异常掩码由数值与参考范围比较得出）
+            abnormal = lab.abnormal_mask()
+            styled_df = df.style.apply(
+                lambda col: np.where(abnormal, 'background-color: #FFEBEE', ''), axis=0
+            )
+            st.dataframe(styled_df, use_container_width=True, height=400)
             
             # 导出按钮
             col1, col2 = st.columns([1, 5])
@@ -117,3 +167,4 @@ def render_page3():
 
 if __name__ == "__main__":
     render_page3()
+    render_profile_panel()
@@ -0,0 +1,197 @@
+"""检验结果异常判定模块
+
+参考范围字符串（如 "4.0-10.0"、"<5"、"阴性"）只按不同取值解析一次，
+得到下限、上限与定性参考组成的查找表；整批结果通过数组比较一次性判定为
+正常 / 偏高 / 偏低 / 危急偏高 / 危急偏低，并生成 abnormal_items 结构。
+"""
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 判定结果编码
+NORMAL = 0
+HIGH = 1
+LOW = 2
+CRITICAL_HIGH = 3
+CRITICAL_LOW = 4
+
+STATUS_LABELS = {
+    NORMAL: '正常',
+    HIGH: '偏高',
+    LOW: '偏低',
+    CRITICAL_HIGH: '危急偏高',
+    CRITICAL_LOW: '危急偏低',
+}
+STATUS_ARROWS = np.array(['', '↑', '↓', '↑↑', '↓↓'])
+
+# 超过上限的倍数 / 低于下限的比例达到该值视为危急
+CRITICAL_HIGH_RATIO = 2.0
+CRITICAL_LOW_RATIO = 0.5
+
+_NUMBER = r'[-+]?\d+(?:\.\d+)?'
+_RANGE = re.compile(rf'^\s*({_NUMBER})\s*[-~～—–]\s*({_NUMBER})\s*$')
+_BOUND = re.compile(rf'^\s*([<>≤≥]=?)\s*({_NUMBER})\s*$')
+_NEGATIVE_TERMS = ('阴性', '-', '—')
+
+
+def parse_reference(text: str) -> Tuple[float, float, bool]:
+    """解析参考范围，返回 (下限, 上限, 是否应为阴性)；无法解析的界限为 NaN"""
+    text = (text or '').strip()
+    if text in _NEGATIVE_TERMS:
+        return np.nan, np.nan, True
+    m = _RANGE.match(text)
+    if m:
+        return float(m.group(1)), float(m.group(2)), False
+    m = _BOUND.match(text)
+    if m:
+        value = float(m.group(2))
+        if m.group(1)[0] in '<≤':
+            return np.nan, value, False
+        return value, np.nan, False
+    return np.nan, np.nan, False
+
+
+class ReferenceTable:
+    """参考范围查找表：每个不同的参考范围字符串只解析一次（线程安全，各会话共用）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._rows: List[Tuple[float, float, bool]] = []
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def codes(self, references: Sequence[str]) -> np.ndarray:
+        """参考范围字符串 -> 查找表下标"""
+        uniques, inverse = np.unique(np.asarray(references, dtype=str), return_inverse=True)
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        with self._lock:
+            for i, text in enumerate(uniques.tolist()):
+                code = self._index.get(text)
+                if code is None:
+                    code = self._index[text] = len(self._rows)
+                    self._rows.append(parse_reference(text))
+                    self._arrays = None
+                mapping[i] = code
+        return mapping[inverse.reshape(-1)]
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(下限, 上限, 是否应为阴性) 三个数组，包含此前 codes() 分配的全部下标"""
+        with self._lock:
+            if self._arrays is None:
+                rows = self._rows or [(np.nan, np.nan, False)]
+                self._arrays = (np.array([r[0] for r in rows], dtype=np.float64),
+                                np.array([r[1] for r in rows], dtype=np.float64),
+                                np.array([r[2] for r in rows], dtype=bool))
+            return self._arrays
+
+    def lookup(self, references: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """按参考范围字符串批量取 (下限, 上限, 是否应为阴性)"""
+        codes = self.codes(references)
+        low, high, negative = self.arrays()
+        return low[codes], high[codes], negative[codes]
+
+
+# 进程内共享的参考范围查找表
+_reference_table = ReferenceTable()
+
+
+def parse_references(references: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """批量解析参考范围，返回 (下限, 上限, 是否应为阴性)"""
+    return _reference_table.lookup(references)
+
+
+def _is_float(text: str) -> bool:
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_results(results: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """批量解析检验结果，返回 (数值, 是否阳性)；非数值结果的数值为 NaN"""
+    results = np.char.strip(np.asarray(results, dtype=str))
+    values = np.full(results.shape, np.nan)
+    # 去掉一个负号和一个小数点后全为数字的才是数值
+    digits = np.char.replace(np.char.lstrip(results, '-+'), '.', '', count=1)
+    numeric = np.char.isdigit(digits)
+    if numeric.any():
+        try:
+            values[numeric] = results[numeric].astype(np.float64)
+        except ValueError:  # 如 "--5" 这类通过了字符检查但不是合法数值的结果
+            numeric &= np.array([_is_float(text) for text in results.tolist()], dtype=bool)
+            values[numeric] = results[numeric].astype(np.float64)
+    positive = ~numeric & ((np.char.find(results, '+') >= 0) | (np.char.find(results, '阳性') >= 0))
+    return values, positive
+
+
+def classify(values: np.ndarray, low: np.ndarray, high: np.ndarray,
+             positive: Optional[np.ndarray] = None,
+             expect_negative: Optional[np.ndarray] = None) -> np.ndarray:
+    """整批判定检验结果
+
+    Args:
+        values: 数值结果（非数值为 NaN）
+        low, high: 参考下限、上限（缺失为 NaN）
+        positive: 定性结果是否阳性
+        expect_negative: 参考是否应为阴性
+
+    Returns:
+        int8 判定编码数组（NORMAL/HIGH/LOW/CRITICAL_HIGH/CRITICAL_LOW）
+    """
+    status = np.zeros(np.shape(values), dtype=np.int8)
+    with np.errstate(invalid='ignore'):
+        high_mask = values > high
+        low_mask = values < low
+        status[high_mask] = HIGH
+        status[low_mask] = LOW
+        status[high_mask & (values >= high * CRITICAL_HIGH_RATIO) & (high > 0)] = CRITICAL_HIGH
+        status[low_mask & (values <= low * CRITICAL_LOW_RATIO)] = CRITICAL_LOW
+    if positive is not None and expect_negative is not None:
+        status[positive & expect_negative] = HIGH
+    return status
+
+
+def classify_results(results: Sequence[str], references: Sequence[str]) -> np.ndarray:
+    """从原始结果与参考范围字符串直接判定"""
+    values, positive = parse_results(results)
+    low, high, negative = parse_references(references)
+    return classify(values, low, high, positive, negative)
+
+
+def _format_value(result: str, unit: str) -> str:
+    if not unit:
+        return result
+    return f"{result}{unit}" if unit == '%' else f"{result} {unit}"
+
+
+def detect_abnormal_items(names: Sequence[str], results: Sequence[str], units: Sequence[str],
+                          references: Sequence[str], status: np.ndarray) -> List[Dict]:
+    """由判定结果生成 abnormal_items（与 abnormal_summary.json 结构一致）"""
+    items = []
+    for i in np.flatnonzero(status):
+        code = int(status[i])
+        critical = code in (CRITICAL_HIGH, CRITICAL_LOW)
+        items.append({
+            'name': str(names[i]),
+            'value': _format_value(str(results[i]), str(units[i])),
+            'status': STATUS_LABELS[code],
+            'meaning': f"{STATUS_LABELS[code]}（参考范围 {references[i]}）",
+            'attention': "危急值，请及时处理。" if critical else "",
+        })
+    return items
+
+
+def merge_abnormal_items(curated: Sequence[Dict], detected: Sequence[Dict]) -> List[Dict]:
+    """合并人工整理与自动检出的异常项，已被人工条目覆盖的检出项不再重复"""
+    merged = list(curated)
+    names = [item.get('name', '') for item in curated]
+    for item in detected:
+        if not any(name and name in item['name'] for name in names):
+            merged.append(item)
+    return merged
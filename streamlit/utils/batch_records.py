@@ -0,0 +1,176 @@
+"""批量生成门诊病历草稿（日终补录）
+
+复用页面4的字段提取与病历格式化逻辑，不依赖 Streamlit。
+患者逐个从磁盘读取，交给进程池并行生成，结果边生成边写出：
+    <out>/records.jsonl     每行一份病历（患者ID、结构化字段、文本、Markdown 文件名）
+    <out>/<患者ID>.md       每位患者一份 Markdown 病历；ID 中路径分隔符等字符替换为 "_"，
+                            同名时依次加 "-2"、"-3" 后缀，不覆盖已写出的病历
+
+用法:
+    python -m utils.batch_records --date 2023-03-27 --out output/records
+    python -m utils.batch_records --input visits.jsonl --out output/records
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
+
+from utils.medical_record import generate_medical_record
+from utils.patient_store import PatientStore
+
+# 文件名只保留文字、数字、下划线和连字符
+_UNSAFE_NAME_CHARS = re.compile(r'[^\w-]+')
+MAX_NAME_LENGTH = 100
+
+# 每个工作进程内复用的存储连接
+_worker_store: Optional[PatientStore] = None
+
+
+def _record_for(patient: Dict, transcript, selected) -> Dict:
+    record = generate_medical_record(patient, transcript, selected or ())
+    return {'patient_id': str(patient.get('patient_id', '')), **record}
+
+
+def generate_from_store(db_path: str, patient_id: str) -> Dict:
+    """在工作进程中读取一位患者并生成病历"""
+    global _worker_store
+    if _worker_store is None or str(_worker_store.path) != db_path:
+        _worker_store = PatientStore(Path(db_path))
+    patient = _worker_store.get_patient(patient_id) or {'patient_id': patient_id}
+    transcript = _worker_store.get_records(patient_id, 'transcript')
+    selected = _worker_store.get_records(patient_id, 'selected_orders')
+    return _record_for(patient, transcript, selected)
+
+
+def generate_from_visit(visit: Dict) -> Dict:
+    """根据一条就诊记录 {patient, transcript, selected_orders} 生成病历"""
+    return _record_for(visit.get('patient') or {}, visit.get('transcript'), visit.get('selected_orders'))
+
+
+def _iter_visits(path: Path) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def safe_file_name(patient_id: str) -> str:
+    """患者ID -> 不含路径分隔符、".." 等字符的文件名（不含扩展名）"""
+    name = _UNSAFE_NAME_CHARS.sub('_', str(patient_id)).strip('_')
+    return name[:MAX_NAME_LENGTH] or 'unknown'
+
+
+class RecordWriter:
+    """增量写出 JSONL 与 Markdown 病历"""
+
+    def __init__(self, out_dir: Path):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._jsonl = open(self.out_dir / 'records.jsonl', 'w', encoding='utf-8')
+        self._names: Set[str] = set()
+
+    def _unique_name(self, patient_id: str) -> str:
+        """同一批次中重复的患者ID（或清理后同名）依次加数字后缀"""
+        base = safe_file_name(patient_id)
+        name, n = base, 1
+        while name in self._names:
+            n += 1
+            name = f"{base}-{n}"
+        self._names.add(name)
+        return f"{name}.md"
+
+    def write(self, record: Dict):
+        markdown = self._unique_name(record['patient_id'])
+        self._jsonl.write(json.dumps({**record, 'markdown': markdown}, ensure_ascii=False) + '\n')
+        self._jsonl.flush()
+        (self.out_dir / markdown).write_text(record['text'], encoding='utf-8')
+
+    def close(self):
+        self._jsonl.close()
+
+
+def run_batch(tasks: Iterator[tuple], writer: RecordWriter, workers: Optional[int] = None,
+              max_pending: int = 0) -> Dict:
+    """并行执行生成任务并写出结果
+
+    Args:
+        tasks: (函数, 参数...) 元组的迭代器，按需读取，不会一次性展开
+        writer: 结果写出器
+        workers: 进程数，默认为 CPU 核数
+        max_pending: 同时在途的任务上限，默认为进程数的 4 倍
+
+    Returns:
+        吞吐统计
+    """
+    start = time.perf_counter()
+    done_count = 0
+    errors = 0
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Set[Future] = set()
+
+        def drain(return_when):
+            nonlocal done_count, errors
+            finished, rest = wait(pending, return_when=return_when)
+            for future in finished:
+                try:
+                    writer.write(future.result())
+                    done_count += 1
+                except Exception as e:
+                    errors += 1
+                    print(f"警告: 病历生成失败: {e}", file=sys.stderr)
+            return rest
+
+        for func, *args in tasks:
+            pending.add(pool.submit(func, *args))
+            if len(pending) >= max_pending:
+                pending = drain(FIRST_COMPLETED)
+        if pending:
+            drain(ALL_COMPLETED)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'records': done_count,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 3),
+        'records_per_second': round(done_count / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main():
+    from utils.data_loader import get_store_path
+
+    parser = argparse.ArgumentParser(description="批量生成门诊病历草稿")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--db', type=Path, default=None, help="患者数据存储（默认 data/patients.db）")
+    source.add_argument('--input', type=Path, help="就诊记录 JSONL，每行 {patient, transcript, selected_orders}")
+    parser.add_argument('--date', help="只处理该就诊日期的患者（仅用于 --db）")
+    parser.add_argument('--out', type=Path, required=True, help="输出目录")
+    parser.add_argument('--workers', type=int, default=None, help="进程数")
+    args = parser.parse_args()
+
+    if args.input:
+        tasks = ((generate_from_visit, visit) for visit in _iter_visits(args.input))
+    else:
+        db_path = args.db or get_store_path()
+        if not db_path.exists():
+            parser.error(f"患者数据存储 {db_path} 不存在，请先运行 python -m utils.patient_store import")
+        store = PatientStore(db_path)
+        tasks = ((generate_from_store, str(db_path), pid) for pid in store.iter_patient_ids(args.date))
+
+    writer = RecordWriter(args.out)
+    try:
+        stats = run_batch(tasks, writer, workers=args.workers)
+    finally:
+        writer.close()
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
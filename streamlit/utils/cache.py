@@ -0,0 +1,141 @@
+"""缓存工具模块
+
+- LRUCache: 容量有限的 LRU 缓存，支持可选 TTL 和版本令牌校验
+- FileCache: 以文件 mtime/大小为版本令牌的 LRUCache，文件改动后自动失效
+
+缓存对象挂在模块级，Streamlit 各次重跑和各个会话共用同一份，
+内部用锁保护；取出的数据是共享对象，调用方应只读使用。
+"""
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class LRUCache:
+    """容量有限的 LRU 缓存
+
+    Args:
+        maxsize: 最多保留的条目数，超出时淘汰最久未使用的条目
+        ttl: 条目存活秒数，None 表示不过期
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (value, token, 写入时间)
+        self._data: "OrderedDict[Hashable, Tuple[Any, Any, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, key: Hashable, token: Any) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        value, cached_token, stored_at = entry
+        expired = self.ttl is not None and time.monotonic() - stored_at > self.ttl
+        if expired or cached_token != token:
+            del self._data[key]
+            self.invalidations += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable, default: Any = None, token: Any = None) -> Any:
+        """读取缓存，token 与写入时不一致视为失效"""
+        with self._lock:
+            value = self._lookup(key, token)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, token: Any = None):
+        """写入缓存，必要时淘汰最久未使用的条目"""
+        with self._lock:
+            self._data[key] = (value, token, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any], token: Any = None) -> Any:
+        """命中则返回缓存值，否则调用 factory 生成并写入"""
+        with self._lock:
+            value = self._lookup(key, token)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+        # 在锁外加载，避免慢加载阻塞其他会话的缓存命中
+        value = factory()
+        self.set(key, value, token)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """删除指定条目"""
+        with self._lock:
+            if self._data.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self):
+        """清空缓存（计数器保留）"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中、未命中、淘汰等计数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+
+def file_token(path: Path) -> Optional[Tuple[int, int]]:
+    """文件版本令牌 (mtime_ns, size)，文件不存在时返回 None"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class FileCache(LRUCache):
+    """按文件 mtime/大小校验的缓存"""
+
+    def get_or_load(self, path: Path, loader: Callable[[Path], Any],
+                    key: Optional[Hashable] = None) -> Any:
+        """读取文件派生的数据
+
+        Args:
+            path: 数据文件路径，其 mtime/大小变化时缓存失效
+            loader: 未命中时调用 loader(path) 加载
+            key: 缓存键，默认为文件路径；同一文件的不同派生数据需使用不同的键
+
+        Returns:
+            loader 的返回值
+        """
+        path = Path(path)
+        return self.get_or_set(key if key is not None else str(path),
+                               lambda: loader(path),
+                               token=file_token(path))
@@ -0,0 +1,108 @@
+"""问诊会话状态模块
+
+保存一次问诊中已接收的对话消息和增量规则匹配结果，
+供问诊页（页面1）与开检查页（页面2）共用，避免各自重新扫描整段对话。
+内存中只保留最近的消息，完整对话写入磁盘日志，由病历页（页面4）分页读取。
+"""
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from utils.cache import LRUCache
+from utils.profiling import profiled
+from utils.rule_engine import CompiledRules, TranscriptMatcher
+from utils.selection import selection_fingerprint
+from utils.transcript_stream import TranscriptLog, ingest, recent_buffer
+
+
+# 检测结果缓存：(规则版本, 对话版本, 选择指纹) -> 结果，所有会话共用
+_check_cache = LRUCache(maxsize=512)
+
+
+def check_cache_stats() -> Dict[str, Any]:
+    """返回检测结果缓存的命中/未命中/淘汰计数"""
+    return _check_cache.stats()
+
+
+class ConsultSession:
+    """一次问诊的共享状态
+
+    Args:
+        rules: 编译后的检查规则
+        patient_id: 就诊患者ID
+        log: 完整对话日志，None 表示不落盘
+        recent_capacity: 内存中保留的最近消息条数
+        statement_capacity: 用作相似病例检索查询的最近病人陈述条数
+    """
+
+    def __init__(self, rules: Optional[CompiledRules] = None, patient_id: Optional[str] = None,
+                 log: Optional[TranscriptLog] = None, recent_capacity: int = 20,
+                 statement_capacity: int = 50):
+        self.rules = rules
+        self.patient_id = patient_id
+        self.session_id = uuid.uuid4().hex
+        self.log = log
+        self.message_count = 0
+        self.recent_messages: Deque[Dict] = recent_buffer(recent_capacity)
+        self.patient_statements: Deque[str] = deque(maxlen=statement_capacity)
+        self.matcher = TranscriptMatcher(rules) if rules else None
+
+    def ingest(self, messages: Iterable[Dict]) -> int:
+        """追加新到达的对话消息
+
+        Args:
+            messages: 新消息（按时间顺序）
+
+        Returns:
+            本次追加的消息数
+        """
+        count = 0
+        for msg in ingest(messages, self.recent_messages, self.log):
+            self.message_count += 1
+            if msg.get('role') == '病人' and msg.get('text'):
+                self.patient_statements.append(msg['text'])
+            if self.matcher:
+                self.matcher.feed(msg)
+            count += 1
+        return count
+
+    def sync(self, transcript: Optional[List[Dict]]) -> int:
+        """与完整对话对齐，只处理尚未接收的尾部消息"""
+        if not transcript or len(transcript) <= self.message_count:
+            return 0
+        return self.ingest(transcript[self.message_count:])
+
+    def close(self):
+        """结束问诊：删除本次问诊的对话日志"""
+        if self.log is not None:
+            self.log.remove()
+
+    def recent(self, n: int = 5) -> List[Dict]:
+        """最近 n 条消息（n 不超过缓冲区容量）"""
+        n = min(n, len(self.recent_messages))
+        return list(self.recent_messages)[-n:] if n else []
+
+    def patient_text(self) -> str:
+        """最近的病人陈述，用作相似病例检索的查询"""
+        return '\n'.join(self.patient_statements)
+
+    @property
+    def transcript_version(self) -> str:
+        """对话版本：本次问诊已接收的消息数"""
+        return f"{self.session_id}:{self.message_count}"
+
+    @profiled('ConsultSession.check_orders')
+    def check_orders(self, selected: Iterable[str]) -> Dict[str, List[Dict]]:
+        """基于当前会话状态执行冲突与遗漏检测
+
+        结果按 (规则版本, 对话版本, 选择指纹) 缓存，状态不变时重复打开提醒无需重新计算。
+        返回的结果为缓存共享对象，调用方应只读使用。
+        """
+        if not self.matcher:
+            return {'conflicts': [], 'missing': []}
+        fingerprint = getattr(selected, 'fingerprint', None) or selection_fingerprint(selected)
+        key = (self.rules.version, self.transcript_version, fingerprint)
+        return _check_cache.get_or_set(key, lambda: {
+            'conflicts': self.rules.find_conflicts(selected),
+            'missing': self.matcher.missing(selected)
+        })
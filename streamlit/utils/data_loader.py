@@ -1,110 +1,326 @@
-"""数据加载工具模块"""
+"""数据加载工具模块
+
+数据目录默认为 streamlit/data，可用环境变量 DOCTOR_MANAGER_DATA_DIR 指定其他目录
+（例如基准测试生成的合成数据）。
+
+依赖 numpy 的检验结果、相似病例模块在首次加载对应数据时才导入，不影响页面冷启动。
+"""
 import json
 import csv
+import os
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from utils.cache import FileCache
+from utils.image_assets import ImageAssets
+from utils.order_search import OrderSearchIndex
+from utils.patient_store import LIST_KINDS, PatientStore
+from utils.profiling import profiled
+from utils.rule_engine import CompiledRules, compile_rules
+
+if TYPE_CHECKING:
+    from utils.lab_history import LabHistory
+    from utils.lab_store import LabTable
+    from utils.scoring_client import ScoringClient
+    from utils.similarity_index import SimilarityIndex
+
+
+# 缓存加载的数据：文件修改后自动重新加载，超出容量时按 LRU 淘汰
+_file_cache = FileCache(maxsize=64)
+# 所有会话共用的索引（编译后的规则、检索索引），不与按患者的数据争用容量
+_index_cache = FileCache(maxsize=16)
+
+
+# 数据目录
+DATA_DIR = Path(os.environ.get('DOCTOR_MANAGER_DATA_DIR') or Path(__file__).parent.parent / "data")
 
 
 def get_data_path(filename: str) -> Path:
     """获取数据文件路径"""
-    return Path(__file__).parent.parent / "data" / filename
+    return DATA_DIR / filename
 
 
-def load_json(filename: str) -> Any:
-    """加载JSON文件
-    
-    Args:
-        filename: JSON文件名
-        
-    Returns:
-        解析后的Python对象
-    """
-    filepath = get_data_path(filename)
+def get_store_path() -> Path:
+    """患者数据存储（SQLite）文件路径"""
+    return get_data_path("patients.db")
+
+
+def get_lab_store_path() -> Path:
+    """检验结果列式存储文件路径"""
+    return get_data_path("lab_results.npz")
+
+
+def get_image_cache_path() -> Path:
+    """报告截图衍生图目录"""
+    return get_data_path("image_cache")
+
+
+def get_case_index_path() -> Path:
+    """相似病例检索索引目录"""
+    return get_data_path("case_index")
+
+
+_store: Optional[PatientStore] = None
+
+
+def get_patient_store() -> Optional[PatientStore]:
+    """获取患者数据存储，数据库文件不存在时返回 None"""
+    global _store
+    path = get_store_path()
+    if not path.exists():
+        return None
+    if _store is None or _store.path != path:
+        _store = PatientStore(path)
+    return _store
+
+
+_image_assets: Optional[ImageAssets] = None
+
+
+def get_image_assets() -> ImageAssets:
+    """获取报告截图衍生图缓存"""
+    global _image_assets
+    if _image_assets is None:
+        _image_assets = ImageAssets(get_image_cache_path())
+    return _image_assets
+
+
+@profiled(record_args=True)
+def load_image(path: Path, width: int) -> Path:
+    """适合展示宽度 width 的报告截图（WebP 衍生图，首次访问时生成）"""
+    return get_image_assets().variant(path, width)
+
+
+_scoring_client: Optional["ScoringClient"] = None
+
+
+def get_scoring_client() -> Optional["ScoringClient"]:
+    """评分服务客户端，未设置 DOCTOR_MANAGER_SCORING_URL 时返回 None（页面在本地计算）"""
+    global _scoring_client
+    url = os.environ.get('DOCTOR_MANAGER_SCORING_URL')
+    if not url:
+        return None
+    if _scoring_client is None or _scoring_client.url != url:
+        from utils.scoring_client import ScoringClient
+        _scoring_client = ScoringClient(url)
+    return _scoring_client
+
+
+def _read_json(filepath: Path) -> Any:
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"警告: 文件 {filename} 不存在")
+        print(f"警告: 文件 {filepath.name} 不存在")
         return None
     except json.JSONDecodeError as e:
-        print(f"警告: 文件 {filename} JSON格式错误: {e}")
+        print(f"警告: 文件 {filepath.name} JSON格式错误: {e}")
         return None
 
 
-def load_csv(filename: str) -> List[Dict[str, str]]:
-    """加载CSV文件
-    
-    Args:
-        filename: CSV文件名
-        
-    Returns:
-        字典列表，每行为一个字典
-    """
-    filepath = get_data_path(filename)
+def _read_csv(filepath: Path) -> List[Dict[str, str]]:
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             return list(reader)
     except FileNotFoundError:
-        print(f"警告: 文件 {filename} 不存在")
+        print(f"警告: 文件 {filepath.name} 不存在")
         return []
 
 
-# 缓存加载的数据
-_cache = {}
+@profiled(record_args=True)
+def load_json(filename: str) -> Any:
+    """加载JSON文件（带缓存）
+
+    Args:
+        filename: JSON文件名
+
+    Returns:
+        解析后的Python对象，调用方应只读使用
+    """
+    return _file_cache.get_or_load(get_data_path(filename), _read_json)
+
+
+@profiled(record_args=True)
+def load_csv(filename: str) -> List[Dict[str, str]]:
+    """加载CSV文件（带缓存）
+
+    Args:
+        filename: CSV文件名
+
+    Returns:
+        字典列表，每行为一个字典，调用方应只读使用
+    """
+    return _file_cache.get_or_load(get_data_path(filename), _read_csv)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """返回数据缓存的命中/未命中/淘汰计数"""
+    return _file_cache.stats()
 
 
-def load_patient_info() -> Dict:
+def index_cache_stats() -> Dict[str, Any]:
+    """返回共用索引缓存的命中/未命中/淘汰计数"""
+    return _index_cache.stats()
+
+
+def clear_cache():
+    """清空数据缓存"""
+    _file_cache.clear()
+    _index_cache.clear()
+
+
+@profiled(record_args=True)
+def _load_for_patient(kind: str, patient_id: Optional[str], filename: str) -> Any:
+    """按患者读取数据
+
+    未指定患者时读取 data/ 下的示例文件；指定患者时只查询存储中该患者的记录，
+    存储不存在或没有该患者时返回空结果（列表类为 []，其余为 None），不显示示例数据。
+    """
+    if patient_id is None:
+        return load_csv(filename) if filename.endswith('.csv') else load_json(filename)
+    store = get_patient_store()
+    if store is None:
+        return [] if kind in LIST_KINDS else None
+
+    def _query(_path: Path) -> Any:
+        if kind == 'patient':
+            return store.get_patient(patient_id)
+        if kind in LIST_KINDS:
+            return store.get_records(patient_id, kind)
+        return store.get_document(patient_id, kind)
+
+    return _file_cache.get_or_load(store.path, _query, key=(kind, str(patient_id)))
+
+
+def load_patient_info(patient_id: Optional[str] = None) -> Dict:
     """加载患者基本信息"""
-    if 'patient' not in _cache:
-        _cache['patient'] = load_json('patient.json')
-    return _cache['patient']
+    return _load_for_patient('patient', patient_id, 'patient.json')
 
 
-def load_transcript() -> List[Dict]:
+def load_transcript(patient_id: Optional[str] = None) -> List[Dict]:
     """加载问诊对话"""
-    if 'transcript' not in _cache:
-        _cache['transcript'] = load_json('transcript.json')
-    return _cache['transcript']
+    return _load_for_patient('transcript', patient_id, 'transcript.json')
 
 
-def load_similar_cases() -> List[Dict]:
+def load_similar_cases(patient_id: Optional[str] = None) -> List[Dict]:
     """加载相似病例"""
-    if 'cases' not in _cache:
-        _cache['cases'] = load_json('similar_cases.json')
-    return _cache['cases']
+    return _load_for_patient('similar_cases', patient_id, 'similar_cases.json')
+
+
+@profiled()
+def load_similarity_index() -> Optional["SimilarityIndex"]:
+    """加载相似病例检索索引，索引未构建时返回 None"""
+    path = get_case_index_path()
+
+    def _open(meta: Path) -> Optional["SimilarityIndex"]:
+        if not meta.exists():
+            return None
+        from utils.similarity_index import SimilarityIndex
+        return SimilarityIndex(path)
+
+    # 以 meta.json 为版本：重建或追加病例后重新打开
+    return _index_cache.get_or_load(path / 'meta.json', _open, key='similarity_index')
 
 
 def load_orders_ranked() -> List[Dict]:
     """加载推荐检查"""
-    if 'orders' not in _cache:
-        _cache['orders'] = load_json('orders_ranked.json')
-    return _cache['orders']
+    return load_json('orders_ranked.json')
+
+
+def get_search_index_path() -> Path:
+    """预先生成的检索辅助数据（拼音首字母），由 tools/build_data.py 生成"""
+    return get_data_path("search_index.json")
+
+
+@profiled()
+def load_order_search_index() -> OrderSearchIndex:
+    """加载检查项目检索索引（目录文件不变时只构建一次）"""
+    def _build(_path: Path) -> OrderSearchIndex:
+        extra = _read_json(get_search_index_path()) if get_search_index_path().exists() else None
+        return OrderSearchIndex(load_orders_ranked(), pinyin=(extra or {}).get('pinyin'))
+
+    return _index_cache.get_or_load(get_data_path('orders_ranked.json'), _build,
+                                   key='order_search_index')
 
 
 def load_order_check_rules() -> Dict:
     """加载检查规则（冲突和遗漏检测）"""
-    if 'check_rules' not in _cache:
-        _cache['check_rules'] = load_json('order_check_rules.json')
-    return _cache['check_rules']
+    return load_json('order_check_rules.json')
+
+
+@profiled()
+def load_compiled_rules() -> Optional[CompiledRules]:
+    """加载编译后的检查规则（规则文件不变时只构建一次匹配结构）"""
+    def _compile(_path: Path) -> Optional[CompiledRules]:
+        rules = load_order_check_rules()
+        return compile_rules(rules) if rules else None
 
+    return _index_cache.get_or_load(get_data_path('order_check_rules.json'), _compile,
+                                   key='compiled_rules')
 
-def load_abnormal_summary() -> Dict:
+
+def load_abnormal_summary(patient_id: Optional[str] = None) -> Dict:
     """加载异常摘要"""
-    if 'abnormal' not in _cache:
-        _cache['abnormal'] = load_json('abnormal_summary.json')
-    return _cache['abnormal']
+    return _load_for_patient('abnormal_summary', patient_id, 'abnormal_summary.json')
 
 
-def load_lab_table() -> List[Dict]:
+def load_lab_table(patient_id: Optional[str] = None) -> List[Dict]:
     """加载检查报告表"""
-    if 'lab_table' not in _cache:
-        _cache['lab_table'] = load_csv('lab_table.csv')
-    return _cache['lab_table']
+    return _load_for_patient('lab_table', patient_id, 'lab_table.csv')
+
+
+def lab_patient_key(patient_id: Optional[str]) -> str:
+    """检验结果中的患者ID，未指定患者时为示例患者的门诊号"""
+    if patient_id is not None:
+        return str(patient_id)
+    return str((load_patient_info() or {}).get('patient_id', ''))
+
+
+def _lab_source(patient_id: Optional[str]) -> Path:
+    """检验结果的来源文件：列式存储、患者存储或示例 CSV"""
+    path = get_lab_store_path()
+    if path.exists():
+        return path
+    store = get_patient_store() if patient_id is not None else None
+    return store.path if store else get_data_path('lab_table.csv')
+
+
+@profiled(record_args=True)
+def load_lab_results(patient_id: Optional[str] = None,
+                     columns: Optional[Iterable[str]] = None) -> "LabTable":
+    """加载检验结果列式表
+
+    列式存储存在时只读取指定列（及该患者的行）；否则由检查报告表解析一次后缓存。
+
+    Args:
+        patient_id: 患者ID，None 表示示例患者
+        columns: 需要的列名，None 表示全部
+    """
+    columns = tuple(columns or ())
+    source = _lab_source(patient_id)
+    # 示例患者也按其门诊号筛选，与列式存储中的 patient_id 一致
+    key = lab_patient_key(patient_id)
+
+    def _load(path: Path) -> "LabTable":
+        from utils.lab_store import LabTable
+        if path == get_lab_store_path():
+            return LabTable.load(path, columns or None, key)
+        return LabTable.from_rows(load_lab_table(patient_id), key).select(columns)
+
+    return _file_cache.get_or_load(source, _load, key=('lab_results', str(patient_id), columns))
+
+
+@profiled(record_args=True)
+def load_lab_history(patient_id: Optional[str] = None) -> "LabHistory":
+    """加载检验结果时间序列（来源文件不变时只排序、建索引一次）"""
+    from utils.lab_history import HISTORY_COLUMNS, LabHistory
+    return _file_cache.get_or_load(
+        _lab_source(patient_id),
+        lambda _p: LabHistory(load_lab_results(patient_id, HISTORY_COLUMNS)),
+        key=('lab_history', str(patient_id)))
 
 
-def load_sidebar_support() -> Dict:
+def load_sidebar_support(patient_id: Optional[str] = None) -> Dict:
     """加载辅助信息"""
-    if 'sidebar' not in _cache:
-        _cache['sidebar'] = load_json('sidebar_support.json')
-    return _cache['sidebar']
+    return _load_for_patient('sidebar_support', patient_id, 'sidebar_support.json')
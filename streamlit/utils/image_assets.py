@@ -0,0 +1,116 @@
+"""报告截图衍生图模块
+
+原图首次被访问时按宽度档位生成 WebP 衍生图并缓存到磁盘，
+文件名由原图内容哈希和档位组成，原图内容不变时直接复用。
+页面按展示宽度取不超过该档位的最小衍生图，避免每次发送原图。
+
+Pillow 在首次生成时才导入；未安装或生成失败时返回原图路径。
+
+预先生成:
+    python -m utils.image_assets data/*.png
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Sequence
+
+from utils.cache import FileCache
+
+# 衍生图宽度档位（像素）
+SIZE_BUCKETS = (320, 640, 1280)
+WEBP_QUALITY = 80
+
+# 原图路径 -> 内容哈希，原图修改后重新计算
+_hash_cache = FileCache(maxsize=1024)
+
+
+def content_hash(path: Path) -> str:
+    """原图内容哈希（按 mtime/大小缓存，不重复读取文件）"""
+    def _digest(p: Path) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        with open(p, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    return _hash_cache.get_or_load(Path(path), _digest)
+
+
+def bucket_for(width: int, buckets: Sequence[int] = SIZE_BUCKETS) -> int:
+    """不小于 width 的最小档位，超过最大档位时取最大档位"""
+    for bucket in buckets:
+        if bucket >= width:
+            return bucket
+    return buckets[-1]
+
+
+class ImageAssets:
+    """衍生图缓存
+
+    Args:
+        cache_dir: 衍生图目录
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    def variant_path(self, source: Path, bucket: int) -> Path:
+        return self.cache_dir / f"{content_hash(source)}_{bucket}.webp"
+
+    def variant(self, source: Path, width: int) -> Path:
+        """返回适合展示宽度 width 的衍生图路径，无法生成时返回原图路径"""
+        source = Path(source)
+        if not source.exists():
+            return source
+        target = self.variant_path(source, bucket_for(width))
+        if target.exists():
+            return target
+        return self._generate(source, target, bucket_for(width)) or source
+
+    def _generate(self, source: Path, target: Path, bucket: int) -> Optional[Path]:
+        try:
+            from PIL import Image
+        except ImportError:
+            return None
+        try:
+            with Image.open(source) as img:
+                img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+                # 只缩小不放大
+                if img.width > bucket:
+                    img = img.resize((bucket, max(1, round(img.height * bucket / img.width))),
+                                     Image.LANCZOS)
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                # 先写临时文件再改名，并发生成时不会读到半个文件；
+                # 每次写入各用一个临时文件，多个线程同时生成同一衍生图也不会互相覆盖
+                fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=f'{target.stem}.', suffix='.tmp')
+                os.close(fd)
+                try:
+                    img.save(tmp, 'WEBP', quality=WEBP_QUALITY, method=4)
+                    os.replace(tmp, target)
+                except BaseException:
+                    Path(tmp).unlink(missing_ok=True)
+                    raise
+        except OSError as e:
+            print(f"警告: 生成 {source.name} 的衍生图失败: {e}")
+            return None
+        return target
+
+
+def main():
+    from utils.data_loader import get_image_assets
+
+    parser = argparse.ArgumentParser(description="生成报告截图的 WebP 衍生图")
+    parser.add_argument('images', nargs='+', type=Path)
+    args = parser.parse_args()
+
+    assets = get_image_assets()
+    for image in args.images:
+        for bucket in SIZE_BUCKETS:
+            path = assets.variant(image, bucket)
+            print(f"{image.name} [{bucket}] -> {path} ({path.stat().st_size} 字节)")
+
+
+if __name__ == "__main__":
+    main()
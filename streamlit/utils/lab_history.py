@@ -0,0 +1,132 @@
+"""检验结果时间序列模块
+
+把检验结果按 (患者, 项目, 时间) 排序一次，并记录每个 (患者, 项目) 序列在
+数组中的起止位置。查询某个指标只访问它自己的切片，时间范围用二分查找定位，
+因此同时绘制几十个指标的趋势也不需要扫描全部历史。
+
+只收录数值结果；定性结果（阳性/阴性）不参与趋势统计。
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.lab_store import LabTable
+
+# 构建时间序列所需的列
+HISTORY_COLUMNS = ('patient_id', 'item', 'unit', 'time', 'value')
+
+
+class LabHistory:
+    """按患者、项目索引的检验结果时间序列
+
+    Args:
+        table: 检验结果列式表，至少包含 HISTORY_COLUMNS
+    """
+
+    def __init__(self, table: LabTable):
+        keep = np.isfinite(table['value']) & ~np.isnat(table['time'])
+        patient_ids = table['patient_id'][keep]
+        items = table['item'][keep]
+        times = table['time'][keep]
+        order = np.lexsort((times, items, patient_ids))
+
+        self.patient_ids = patient_ids[order]
+        self.items = items[order]
+        self.times = times[order]
+        self.values = table['value'][keep][order]
+        self.units = table['unit'][keep][order]
+
+        # (患者, 项目) -> (起, 止)
+        self._slices: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        # 患者 -> 项目列表
+        self._analytes: Dict[str, List[str]] = {}
+        if len(order):
+            changed = (self.patient_ids[1:] != self.patient_ids[:-1]) | (self.items[1:] != self.items[:-1])
+            starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+            stops = np.append(starts[1:], len(order))
+            for start, stop in zip(starts.tolist(), stops.tolist()):
+                pid, item = str(self.patient_ids[start]), str(self.items[start])
+                self._slices[(pid, item)] = (start, stop)
+                self._analytes.setdefault(pid, []).append(item)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def analytes(self, patient_id: str) -> List[str]:
+        """该患者有数值结果的项目"""
+        return list(self._analytes.get(str(patient_id), []))
+
+    def _slice(self, patient_id: str, item: str) -> Tuple[int, int]:
+        return self._slices.get((str(patient_id), item), (0, 0))
+
+    def unit(self, patient_id: str, item: str) -> str:
+        start, stop = self._slice(patient_id, item)
+        return str(self.units[stop - 1]) if stop > start else ''
+
+    def series(self, patient_id: str, item: str, start: Optional[str] = None,
+               end: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """时间范围 [start, end] 内的 (时间, 数值)，日期为 'YYYY-MM-DD'，None 表示不限"""
+        base, hi = self._slice(patient_id, item)
+        times, lo = self.times[base:hi], base
+        if start is not None:
+            lo = base + int(np.searchsorted(times, np.datetime64(start, 'D'), side='left'))
+        if end is not None:
+            hi = base + int(np.searchsorted(times, np.datetime64(end, 'D'), side='right'))
+        return self.times[lo:hi], self.values[lo:hi]
+
+    def last(self, patient_id: str, item: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """最近 n 次结果"""
+        lo, hi = self._slice(patient_id, item)
+        lo = max(lo, hi - n)
+        return self.times[lo:hi], self.values[lo:hi]
+
+    def delta(self, patient_id: str, item: str) -> Optional[float]:
+        """最近一次就诊与上一次就诊的差值（同一天多次结果取当天最后一次）"""
+        times, values = self.series(patient_id, item)
+        if not len(times):
+            return None
+        earlier = np.searchsorted(times, times[-1], side='left')
+        if earlier == 0:
+            return None
+        return float(values[-1] - values[earlier - 1])
+
+    def rolling_mean(self, patient_id: str, item: str, window: int) -> np.ndarray:
+        """窗口为 window 个结果的滑动均值（前 window-1 个点按已有结果计算）"""
+        _, values = self.series(patient_id, item)
+        if not len(values):
+            return values
+        sums = np.cumsum(np.insert(values, 0, 0.0))
+        counts = np.minimum(np.arange(1, len(values) + 1), window)
+        ends = np.arange(1, len(values) + 1)
+        return (sums[ends] - sums[ends - counts]) / counts
+
+    def downsample(self, patient_id: str, item: str, max_points: int,
+                   start: Optional[str] = None, end: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """按时间等分为至多 max_points 段，每段取均值"""
+        times, values = self.series(patient_id, item, start, end)
+        if len(times) <= max_points:
+            return times, values
+        days = times.astype(np.int64)
+        edges = np.linspace(days[0], days[-1] + 1, max_points + 1)
+        buckets = np.searchsorted(days, edges[:-1], side='left')
+        buckets = np.unique(buckets)
+        counts = np.diff(np.append(buckets, len(values)))
+        means = np.add.reduceat(values, buckets) / counts
+        return times[buckets], means
+
+    def summary(self, patient_id: str, item: str, n: int = 5) -> Optional[Dict]:
+        """最近 n 次结果的统计：最新值、较上次变化、均值、最小值、最大值"""
+        times, values = self.last(patient_id, item, n)
+        if not len(values):
+            return None
+        return {
+            'item': item,
+            'unit': self.unit(patient_id, item),
+            'latest': float(values[-1]),
+            'latest_time': str(times[-1]),
+            'delta': self.delta(patient_id, item),
+            'mean': float(values.mean()),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'count': len(values),
+        }
@@ -0,0 +1,213 @@
+"""检验结果列式存储模块
+
+检验结果按列保存为 NumPy 数组（.npz），写入时解析一次：
+- 结果：数值列 value，定性结果（"4+"、阳性）记入 positive
+- 参考范围：数值下限 low / 上限 high，定性参考（阴性）记入 expect_negative
+
+异常标记由 utils.abnormal_detection 按数组比较得出，不依赖原始数据中的"标记"列。
+写入时按患者排序并记录各患者行的起止位置；读取时只加载需要的列，
+指定患者时直接定位到该患者的行区间读取，不解析其他患者的数据。
+
+从示例数据和患者存储构建:
+    python -m utils.lab_store build
+"""
+import argparse
+import os
+import struct
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.abnormal_detection import (
+    CRITICAL_HIGH, CRITICAL_LOW, HIGH, LOW, STATUS_ARROWS, classify, detect_abnormal_items,
+    parse_references, parse_results
+)
+
+# CSV 表头 -> 列名
+CSV_COLUMNS = {
+    '项目': 'item',
+    '结果': 'result',
+    '单位': 'unit',
+    '参考范围': 'reference',
+    '时间': 'time',
+}
+# 计算异常标记所需的列
+FLAG_COLUMNS = ('value', 'low', 'high', 'positive', 'expect_negative')
+# 患者索引：排序后的患者ID，及各患者行的起始位置（末尾为总行数）
+INDEX_PATIENTS = '_index_patient_ids'
+INDEX_OFFSETS = '_index_offsets'
+
+_HEADER_READERS = {
+    (1, 0): np.lib.format.read_array_header_1_0,
+    (2, 0): np.lib.format.read_array_header_2_0,
+}
+
+
+def _to_dates(values: Iterable[str]) -> np.ndarray:
+    dates = []
+    for value in values:
+        try:
+            dates.append(np.datetime64(value or 'NaT', 'D'))
+        except ValueError:
+            dates.append(np.datetime64('NaT', 'D'))
+    return np.array(dates, dtype='datetime64[D]')
+
+
+def _read_rows(f: BinaryIO, info: zipfile.ZipInfo, start: int = 0,
+               stop: Optional[int] = None) -> np.ndarray:
+    """读取 .npz 中一维数组的 [start, stop) 行
+
+    np.savez 写入的成员不压缩，跳过本地文件头和 .npy 头后按行宽定位，只读取区间内的字节。
+    """
+    f.seek(info.header_offset)
+    name_len, extra_len = struct.unpack('<HH', f.read(30)[26:30])
+    f.seek(info.header_offset + 30 + name_len + extra_len)
+    version = np.lib.format.read_magic(f)
+    reader = _HEADER_READERS.get(version)
+    if info.compress_type != zipfile.ZIP_STORED or reader is None:
+        raise ValueError(f"不支持的列格式: {info.filename}")
+    shape, _fortran, dtype = reader(f)
+    stop = shape[0] if stop is None else min(stop, shape[0])
+    start = min(start, stop)
+    f.seek(start * dtype.itemsize, os.SEEK_CUR)
+    return np.frombuffer(f.read((stop - start) * dtype.itemsize), dtype=dtype).copy()
+
+
+class LabTable:
+    """检验结果列式表
+
+    Args:
+        columns: 列名 -> 等长的一维数组
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        for array in self.columns.values():
+            return len(array)
+        return 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, str]], patient_id: str = '') -> 'LabTable':
+        """从 CSV 字典行构建；参考范围经查找表解析，相同取值只解析一次"""
+        raw = {name: [row.get(header) or '' for row in rows] for header, name in CSV_COLUMNS.items()}
+        columns = {name: np.array(raw[name], dtype=str) for name in ('item', 'result', 'unit', 'reference')}
+        columns['patient_id'] = np.full(len(rows), str(patient_id))
+        columns['time'] = _to_dates(raw['time'])
+        columns['value'], columns['positive'] = parse_results(columns['result'])
+        columns['low'], columns['high'], columns['expect_negative'] = parse_references(columns['reference'])
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, tables: Sequence['LabTable']) -> 'LabTable':
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls.from_rows([])
+        return cls({name: np.concatenate([t[name] for t in tables]) for name in tables[0].columns})
+
+    def save(self, path: Path):
+        """按患者排序后写入，并附带患者索引"""
+        order = np.argsort(self['patient_id'], kind='stable')
+        columns = {name: array[order] for name, array in self.columns.items()}
+        patients, starts = np.unique(columns['patient_id'], return_index=True)
+        np.savez(path, **columns, **{INDEX_PATIENTS: patients,
+                                     INDEX_OFFSETS: np.append(starts, len(order))})
+
+    @staticmethod
+    def _patient_rows(f: BinaryIO, members: Dict[str, zipfile.ZipInfo],
+                      patient_id: str) -> Tuple[int, int]:
+        """患者行在各列中的 [起, 止)，没有该患者时为空区间"""
+        patients = _read_rows(f, members[INDEX_PATIENTS])
+        i = int(np.searchsorted(patients, patient_id))
+        if i == len(patients) or patients[i] != patient_id:
+            return 0, 0
+        offsets = _read_rows(f, members[INDEX_OFFSETS], i, i + 2)
+        return int(offsets[0]), int(offsets[1])
+
+    @classmethod
+    def load(cls, path: Path, columns: Optional[Iterable[str]] = None,
+             patient_id: Optional[str] = None) -> 'LabTable':
+        """读取 .npz，只加载指定列；指定患者时只读取该患者的行"""
+        with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+            members = {info.filename[:-len('.npy')]: info for info in zf.infolist()}
+            index = (INDEX_PATIENTS, INDEX_OFFSETS)
+            names = list(columns) if columns else [name for name in members if name not in index]
+            if patient_id is None:
+                return cls({name: _read_rows(f, members[name]) for name in names})
+            if INDEX_PATIENTS not in members:
+                print(f"警告: {path} 缺少患者索引，请重新运行 python -m utils.lab_store build")
+                rows = _read_rows(f, members['patient_id']) == str(patient_id)
+                return cls({name: _read_rows(f, members[name])[rows] for name in names})
+            start, stop = cls._patient_rows(f, members, str(patient_id))
+            return cls({name: _read_rows(f, members[name], start, stop) for name in names})
+
+    def select(self, columns: Optional[Iterable[str]] = None) -> 'LabTable':
+        if not columns:
+            return self
+        return LabTable({name: self.columns[name] for name in columns})
+
+    def status(self) -> np.ndarray:
+        """异常判定编码（见 utils.abnormal_detection）"""
+        return classify(self['value'], self['low'], self['high'],
+                        self['positive'], self['expect_negative'])
+
+    def high_mask(self) -> np.ndarray:
+        """高于上限，或参考为阴性而结果阳性"""
+        return np.isin(self.status(), (HIGH, CRITICAL_HIGH))
+
+    def low_mask(self) -> np.ndarray:
+        """低于下限"""
+        return np.isin(self.status(), (LOW, CRITICAL_LOW))
+
+    def abnormal_mask(self) -> np.ndarray:
+        return self.status() != 0
+
+    def flags(self) -> np.ndarray:
+        """异常标记列：'↑'、'↓'，危急值为 '↑↑'、'↓↓'，正常为空串"""
+        return STATUS_ARROWS[self.status()]
+
+    def abnormal_items(self) -> List[Dict]:
+        """自动检出的异常项（abnormal_items 结构）"""
+        return detect_abnormal_items(self['item'], self['result'], self['unit'],
+                                     self['reference'], self.status())
+
+
+def build_lab_store(path: Path, data_dir: Path, store=None) -> int:
+    """把示例检验结果和患者存储中的检验结果写入 .npz，返回行数"""
+    from utils.data_loader import _read_csv, _read_json
+
+    patient = _read_json(Path(data_dir) / 'patient.json') or {}
+    tables = [LabTable.from_rows(_read_csv(Path(data_dir) / 'lab_table.csv'),
+                                 patient.get('patient_id', ''))]
+    if store is not None:
+        for pid in store.iter_patient_ids():
+            if pid != str(patient.get('patient_id', '')):
+                tables.append(LabTable.from_rows(store.get_records(pid, 'lab_table'), pid))
+    table = LabTable.concat(tables)
+    table.save(path)
+    return len(table)
+
+
+def main():
+    from utils.data_loader import get_data_path, get_lab_store_path, get_patient_store
+
+    parser = argparse.ArgumentParser(description="检验结果列式存储工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help="从示例数据和患者存储构建")
+    p_build.add_argument('--out', type=Path, default=get_lab_store_path())
+    p_build.add_argument('--data-dir', type=Path, default=get_data_path(''))
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        count = build_lab_store(args.out, args.data_dir, get_patient_store())
+        print(f"已写入 {count} 条检验结果 -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
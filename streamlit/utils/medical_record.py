@@ -0,0 +1,233 @@
+"""门诊病历生成模块
+
+对话只扫描一遍：每条消息依次交给已注册的字段提取器，
+所有提取器完成后提前结束；病历文本按行收集后一次性拼接。
+本模块不依赖 Streamlit，可供页面4和批量生成工具共用。
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_PAST_HISTORY = "既往体健，否认药敏史"
+DEFAULT_AUXILIARY_EXAMS = "过敏原检测、血常规"
+
+# 病历字段顺序及标签（标签含对齐用的空格）
+RECORD_FIELDS = [
+    ('chief_complaint', "主诉:         "),
+    ('present_illness', "现病史:       "),
+    ('past_history', "既往史:       "),
+    ('physical_exam', "体格检查:     "),
+    ('vital_signs', "生命体征:     "),
+    ('auxiliary_exams', "辅助检查:     "),
+    ('suggestions', "建议:         "),
+]
+
+
+class FieldExtractor(ABC):
+    """字段提取器基类：逐条接收对话消息，结束后给出字段值"""
+
+    field = ''
+
+    def __init__(self):
+        self.done = False
+
+    @abstractmethod
+    def feed(self, msg: Dict):
+        """接收一条对话消息；字段已确定时把 done 置为 True"""
+
+    @abstractmethod
+    def result(self) -> str:
+        """字段值"""
+
+
+class ChiefComplaintExtractor(FieldExtractor):
+    """主诉 - 病人第一次描述症状"""
+
+    field = 'chief_complaint'
+
+    def __init__(self):
+        super().__init__()
+        self._value = ""
+
+    def feed(self, msg: Dict):
+        if msg.get('role') == '病人':
+            text = msg.get('text', '')
+            # 跳过简单的"没有"等回答
+            if len(text) > 5 and '没有' not in text:
+                self._value = text
+                self.done = True
+
+    def result(self) -> str:
+        return self._value
+
+
+class PresentIllnessExtractor(FieldExtractor):
+    """现病史 - 保留所有病人的陈述，原文不变"""
+
+    field = 'present_illness'
+
+    def __init__(self):
+        super().__init__()
+        self._statements: List[str] = []
+
+    def feed(self, msg: Dict):
+        if msg.get('role') == '病人':
+            text = msg.get('text', '').strip()
+            if text:
+                self._statements.append(text)
+
+    def result(self) -> str:
+        # 保留换行，每条陈述独立一行
+        return '\n'.join(self._statements)
+
+
+class PastHistoryExtractor(FieldExtractor):
+    """既往史 - 医生询问既往史/过敏史后，病人的下一句回答"""
+
+    field = 'past_history'
+    KEYWORDS = ('以前', '过敏', '既往')
+
+    def __init__(self):
+        super().__init__()
+        self._value = DEFAULT_PAST_HISTORY
+        self._asked = False
+
+    def feed(self, msg: Dict):
+        if self._asked:
+            self._asked = False
+            if msg.get('role') == '病人':
+                patient_response = msg.get('text', '').strip()
+                if patient_response:
+                    # 如果病人说没有，使用标准表述
+                    if '没有' not in patient_response:
+                        self._value = patient_response
+                    self.done = True
+                    return
+        if msg.get('role') == '医生':
+            text = msg.get('text', '')
+            if any(kw in text for kw in self.KEYWORDS):
+                self._asked = True
+
+    def result(self) -> str:
+        return self._value
+
+
+# 默认注册的对话字段提取器
+DEFAULT_EXTRACTORS: List[Callable[[], FieldExtractor]] = [
+    ChiefComplaintExtractor,
+    PresentIllnessExtractor,
+    PastHistoryExtractor,
+]
+
+
+def extract_transcript_fields(transcript: Optional[Iterable[Dict]],
+                              extractors: Optional[List[Callable[[], FieldExtractor]]] = None) -> Dict[str, str]:
+    """单次扫描对话，返回各提取器的字段值
+
+    Args:
+        transcript: 对话消息（可为列表或生成器）
+        extractors: 提取器工厂列表，默认使用 DEFAULT_EXTRACTORS
+
+    Returns:
+        字段名 -> 字段值
+    """
+    active = [factory() for factory in (extractors or DEFAULT_EXTRACTORS)]
+    pending = list(active)
+    for msg in transcript or ():
+        for extractor in pending:
+            extractor.feed(msg)
+        if any(extractor.done for extractor in pending):
+            pending = [extractor for extractor in pending if not extractor.done]
+            if not pending:
+                break
+    return {extractor.field: extractor.result() for extractor in active}
+
+
+def extract_physical_examination() -> str:
+    """提取体格检查结果"""
+    # 根据检查结果提取
+    # 这里应该从检查报告中提取，目前使用示例数据
+    return "鼻黏膜苍白，双侧下鼻甲肿大，总鼻道可见清水样鼻涕。"
+
+
+def extract_vital_signs() -> str:
+    """提取生命体征"""
+    # 这里可以从patient数据或检查结果中提取
+    return "收缩压:120mmHg、舒张压:78mmHg"
+
+
+def extract_auxiliary_exams(selected: Iterable[str] = ()) -> str:
+    """提取辅助检查（已选检查项目）"""
+    text = '、'.join(selected)
+    return text or DEFAULT_AUXILIARY_EXAMS
+
+
+def extract_suggestions() -> str:
+    """从检查报告中提取建议"""
+    # 这里可以从检查报告数据中提取
+    return "避开过敏原，不适随诊。"
+
+
+class RecordBuilder:
+    """按行收集病历内容，最后一次性拼接"""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def add_header(self, patient: Dict) -> 'RecordBuilder':
+        """患者基本信息行"""
+        self._lines.append(''.join([
+            f"姓名:{patient.get('name', '')}                         ",
+            f"性别:{patient.get('gender', '')}                     ",
+            f"年龄:{patient.get('age', '')}岁                    ",
+            f"门诊号:{patient.get('patient_id', '')} ",
+            f"就诊科室:{patient.get('department', '')}",
+        ]))
+        return self
+
+    def add_field(self, label: str, value: str) -> 'RecordBuilder':
+        self._lines.append(f"{label}{value}")
+        return self
+
+    def build(self) -> str:
+        return '\n'.join(self._lines) + '\n'
+
+
+def format_medical_record(patient: Dict, chief_complaint: str, present_illness: str,
+                          past_history: str, physical_exam: str, vital_signs: str,
+                          auxiliary_exams: str, suggestions: str) -> str:
+    """格式化完整病历"""
+    values = {
+        'chief_complaint': chief_complaint,
+        'present_illness': present_illness,
+        'past_history': past_history,
+        'physical_exam': physical_exam,
+        'vital_signs': vital_signs,
+        'auxiliary_exams': auxiliary_exams,
+        'suggestions': suggestions,
+    }
+    builder = RecordBuilder().add_header(patient or {})
+    for field, label in RECORD_FIELDS:
+        builder.add_field(label, values[field])
+    return builder.build()
+
+
+def generate_medical_record(patient: Dict, transcript: Optional[Iterable[Dict]],
+                            selected: Iterable[str] = ()) -> Dict:
+    """生成门诊病历
+
+    Args:
+        patient: 患者基本信息
+        transcript: 问诊对话
+        selected: 已选检查项目
+
+    Returns:
+        {'fields': 字段名 -> 字段值, 'text': 病历文本}
+    """
+    fields = extract_transcript_fields(transcript)
+    fields.update({
+        'physical_exam': extract_physical_examination(),
+        'vital_signs': extract_vital_signs(),
+        'auxiliary_exams': extract_auxiliary_exams(selected),
+        'suggestions': extract_suggestions(),
+    })
+    return {'fields': fields, 'text': format_medical_record(patient, **fields)}
@@ -0,0 +1,191 @@
+"""检查项目检索索引模块
+
+对 orders_ranked.json 中的项目名称、tags 和 reason 预先建立索引，支持：
+- 名称子串 / 前缀匹配（字符 n-gram 倒排表求交后校验）
+- 英文缩写前缀匹配，如 "CRP"、"cbc"
+- 拼音首字母前缀匹配，如 "xcg" -> 血常规（需安装 pypinyin）
+- 标签、理由匹配，以及按 n-gram 重合度的模糊匹配
+
+查询只访问查询词 n-gram 对应的倒排表和前缀区间，不扫描整个目录。
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# 各类命中的得分，同一项目取最高分
+SCORE_NAME_EXACT = 100
+SCORE_NAME_PREFIX = 90
+SCORE_NAME_SUBSTRING = 80
+SCORE_ABBR_PREFIX = 75
+SCORE_PINYIN_PREFIX = 70
+SCORE_TAG = 50
+SCORE_REASON = 30
+SCORE_FUZZY = 20
+
+# 模糊匹配至少需要命中的查询 n-gram 数与比例
+FUZZY_MIN_GRAMS = 2
+FUZZY_MIN_RATIO = 0.5
+
+_LATIN_TOKEN = re.compile(r'[A-Za-z][A-Za-z0-9]*')
+_BRACKETED = re.compile(r'\s*[\(（][^\)）]*[\)）]')
+
+
+def _normalize(text: str) -> str:
+    return (text or '').strip().lower()
+
+
+def _is_han(ch: str) -> bool:
+    return '\u4e00' <= ch <= '\u9fff'
+
+
+_pypinyin = None
+
+
+def _load_pypinyin():
+    """首次需要时才导入 pypinyin（导入约需数百毫秒），未安装时返回 False"""
+    global _pypinyin
+    if _pypinyin is None:
+        try:
+            import pypinyin
+        except ImportError:  # 未安装时不提供拼音首字母检索
+            pypinyin = False
+        _pypinyin = pypinyin
+    return _pypinyin
+
+
+def pinyin_initials(name: str) -> str:
+    """名称的拼音首字母（括号内的注释部分除外），未安装 pypinyin 时返回空串"""
+    pypinyin = _load_pypinyin()
+    if not pypinyin:
+        return ''
+    initials = []
+    for ch in _BRACKETED.sub('', name):
+        if _is_han(ch):
+            initials.append(pypinyin.lazy_pinyin(ch, style=pypinyin.Style.FIRST_LETTER)[0].lower())
+        elif ch.isalnum():
+            initials.append(ch.lower())
+    return ''.join(initials)
+
+
+def _grams(text: str) -> Set[str]:
+    """长度为 1 的文本取单字，否则取全部相邻二字组"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class OrderSearchIndex:
+    """检查项目检索索引
+
+    Args:
+        orders: 检查项目列表，构建时按 order 字段排序一次
+        pinyin: 预先生成的 名称 -> 拼音首字母，其中没有的名称才用 pypinyin 计算
+    """
+
+    def __init__(self, orders: List[Dict], pinyin: Optional[Dict[str, str]] = None):
+        self.orders: List[Dict] = sorted(orders or [], key=lambda x: x.get('order', 999))
+        self._names: List[str] = []
+        self._reasons: List[str] = []
+        # n-gram -> 项目下标
+        self._name_grams: Dict[str, Set[int]] = {}
+        self._reason_grams: Dict[str, Set[int]] = {}
+        # 标签 -> 项目下标
+        self._tags: Dict[str, Set[int]] = {}
+        # 排序后的 (词, 项目下标)，用 bisect 做前缀检索
+        self._abbr_terms: List[Tuple[str, int]] = []
+        self._pinyin_terms: List[Tuple[str, int]] = []
+
+        for idx, order in enumerate(self.orders):
+            name = _normalize(order.get('order_name', ''))
+            reason = _normalize(order.get('reason', ''))
+            self._names.append(name)
+            self._reasons.append(reason)
+            for gram in _grams(name) | set(name):
+                self._name_grams.setdefault(gram, set()).add(idx)
+            for gram in _grams(reason) | set(reason):
+                self._reason_grams.setdefault(gram, set()).add(idx)
+            for tag in order.get('tags', []):
+                self._tags.setdefault(_normalize(tag), set()).add(idx)
+            for token in _LATIN_TOKEN.findall(name):
+                self._abbr_terms.append((token, idx))
+            raw_name = order.get('order_name', '')
+            initials = (pinyin or {}).get(raw_name) or pinyin_initials(raw_name)
+            if initials:
+                self._pinyin_terms.append((initials, idx))
+
+        self._abbr_terms.sort()
+        self._pinyin_terms.sort()
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def pinyin_map(self) -> Dict[str, str]:
+        """名称 -> 拼音首字母，供构建工具预先生成"""
+        return {self.orders[idx].get('order_name', ''): initials for initials, idx in self._pinyin_terms}
+
+    @staticmethod
+    def _prefix_hits(terms: List[Tuple[str, int]], prefix: str) -> Set[int]:
+        hits = set()
+        pos = bisect_left(terms, (prefix, -1))
+        while pos < len(terms) and terms[pos][0].startswith(prefix):
+            hits.add(terms[pos][1])
+            pos += 1
+        return hits
+
+    @staticmethod
+    def _candidates(postings: Dict[str, Set[int]], query: str) -> Dict[int, int]:
+        """统计每个项目命中的查询 n-gram 数"""
+        counts: Dict[int, int] = {}
+        for gram in _grams(query):
+            for idx in postings.get(gram, ()):
+                counts[idx] = counts.get(idx, 0) + 1
+        return counts
+
+    def search(self, query: str, limit: int = 0) -> List[Dict]:
+        """检索检查项目
+
+        Args:
+            query: 查询词（名称片段、英文缩写、拼音首字母或标签）
+            limit: 最多返回条数，0 表示不限
+
+        Returns:
+            按得分降序、同分按 order 升序排列的检查项目
+        """
+        query = _normalize(query)
+        if not query:
+            return self.orders[:limit] if limit else list(self.orders)
+
+        scores: Dict[int, int] = {}
+
+        def hit(idx: int, score: int):
+            if score > scores.get(idx, 0):
+                scores[idx] = score
+
+        total_grams = len(_grams(query))
+        for idx, matched in self._candidates(self._name_grams, query).items():
+            name = self._names[idx]
+            if matched == total_grams and query in name:
+                if name == query:
+                    hit(idx, SCORE_NAME_EXACT)
+                elif name.startswith(query):
+                    hit(idx, SCORE_NAME_PREFIX)
+                else:
+                    hit(idx, SCORE_NAME_SUBSTRING)
+            elif matched >= FUZZY_MIN_GRAMS and matched / total_grams >= FUZZY_MIN_RATIO:
+                hit(idx, int(SCORE_FUZZY * matched / total_grams))
+
+        for idx in self._prefix_hits(self._abbr_terms, query):
+            hit(idx, SCORE_ABBR_PREFIX)
+        for idx in self._prefix_hits(self._pinyin_terms, query):
+            hit(idx, SCORE_PINYIN_PREFIX)
+        for idx in self._tags.get(query, ()):
+            hit(idx, SCORE_TAG)
+        for idx, matched in self._candidates(self._reason_grams, query).items():
+            if matched == total_grams and query in self._reasons[idx]:
+                hit(idx, SCORE_REASON)
+
+        ranked = sorted(scores, key=lambda idx: (-scores[idx], idx))
+        if limit:
+            ranked = ranked[:limit]
+        return [self.orders[idx] for idx in ranked]
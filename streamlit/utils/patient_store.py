@@ -0,0 +1,157 @@
+"""按患者分片的数据存储模块（SQLite）
+
+每位患者的基本信息存于 patients 表，其余数据按 (patient_id, kind, seq)
+存于 records 表，主键即查询索引。读取某位患者的数据只会解析该患者的行。
+
+导入示例数据:
+    python -m utils.patient_store import
+"""
+import argparse
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# 列表型数据：每个元素一行
+LIST_KINDS = ('transcript', 'lab_table', 'similar_cases', 'selected_orders')
+# 字典型数据：整份文档一行
+DOCUMENT_KINDS = ('abnormal_summary', 'sidebar_support')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id TEXT PRIMARY KEY,
+    visit_date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_patients_visit_date ON patients (visit_date);
+CREATE TABLE IF NOT EXISTS records (
+    patient_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (patient_id, kind, seq)
+) WITHOUT ROWID;
+"""
+
+
+class PatientStore:
+    """患者数据存储
+
+    Args:
+        path: SQLite 数据库文件路径
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # sqlite3 连接不能跨线程使用，Streamlit 每个会话在独立线程中运行
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path))
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def put_patient(self, patient: Dict, records: Optional[Dict[str, Any]] = None):
+        """写入（或覆盖）一位患者的全部数据
+
+        Args:
+            patient: 患者基本信息，须含 patient_id
+            records: kind -> 数据；列表型按元素逐行存储，字典型整份存储
+        """
+        patient_id = str(patient['patient_id'])
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO patients (patient_id, visit_date, data) VALUES (?, ?, ?)",
+                (patient_id, patient.get('visit_date'), json.dumps(patient, ensure_ascii=False))
+            )
+            for kind, value in (records or {}).items():
+                conn.execute("DELETE FROM records WHERE patient_id = ? AND kind = ?", (patient_id, kind))
+                rows = value if kind in LIST_KINDS else [value]
+                conn.executemany(
+                    "INSERT INTO records (patient_id, kind, seq, data) VALUES (?, ?, ?, ?)",
+                    [(patient_id, kind, seq, json.dumps(row, ensure_ascii=False))
+                     for seq, row in enumerate(rows or [])]
+                )
+
+    def get_patient(self, patient_id: str) -> Optional[Dict]:
+        """读取患者基本信息"""
+        row = self._conn().execute(
+            "SELECT data FROM patients WHERE patient_id = ?", (str(patient_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_records(self, patient_id: str, kind: str) -> List[Any]:
+        """读取一位患者某类列表型数据，按写入顺序返回"""
+        rows = self._conn().execute(
+            "SELECT data FROM records WHERE patient_id = ? AND kind = ? ORDER BY seq",
+            (str(patient_id), kind)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def get_document(self, patient_id: str, kind: str) -> Optional[Dict]:
+        """读取一位患者某类字典型数据"""
+        row = self._conn().execute(
+            "SELECT data FROM records WHERE patient_id = ? AND kind = ? AND seq = 0",
+            (str(patient_id), kind)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_patient_ids(self, visit_date: Optional[str] = None) -> Iterator[str]:
+        """逐个返回患者ID，可按就诊日期筛选"""
+        if visit_date:
+            cursor = self._conn().execute(
+                "SELECT patient_id FROM patients WHERE visit_date = ? ORDER BY patient_id", (visit_date,)
+            )
+        else:
+            cursor = self._conn().execute("SELECT patient_id FROM patients ORDER BY patient_id")
+        for (patient_id,) in cursor:
+            yield patient_id
+
+
+def import_demo_data(store: PatientStore, data_dir: Path) -> str:
+    """把 data/ 下的单患者示例文件导入存储，返回患者ID"""
+    from utils.data_loader import _read_csv, _read_json
+
+    data_dir = Path(data_dir)
+    patient = _read_json(data_dir / 'patient.json')
+    records = {
+        'transcript': _read_json(data_dir / 'transcript.json') or [],
+        'similar_cases': _read_json(data_dir / 'similar_cases.json') or [],
+        'lab_table': _read_csv(data_dir / 'lab_table.csv'),
+        'abnormal_summary': _read_json(data_dir / 'abnormal_summary.json'),
+        'sidebar_support': _read_json(data_dir / 'sidebar_support.json'),
+    }
+    store.put_patient(patient, {k: v for k, v in records.items() if v is not None})
+    return str(patient['patient_id'])
+
+
+def main():
+    from utils.data_loader import get_data_path, get_store_path
+
+    parser = argparse.ArgumentParser(description="患者数据存储工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_import = sub.add_parser('import', help="导入 data/ 下的示例患者")
+    p_import.add_argument('--db', type=Path, default=get_store_path())
+    p_import.add_argument('--data-dir', type=Path, default=get_data_path(''))
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        store = PatientStore(args.db)
+        patient_id = import_demo_data(store, args.data_dir)
+        print(f"已导入患者 {patient_id} -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""重跑耗时分析模块
+
+设置环境变量 DOCTOR_MANAGER_PROFILE=1 后启用：
+- span(name) 上下文管理器 / profiled() 装饰器记录一段代码的耗时、
+  新分配的内存块数与 tracemalloc 统计的内存增量
+- 最外层的 span 即一次重跑（或一次片段重跑），最近的若干次保存在内存中
+- render_profile_panel() 在侧边栏显示最近一次重跑的分段耗时与各缓存命中情况，
+  并可把记录导出为 Chrome trace JSON（chrome://tracing 或 Perfetto 打开）
+
+未启用时 span/profiled 只做一次布尔判断，不影响正常运行。
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+ENABLED = os.environ.get('DOCTOR_MANAGER_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+# 保留的重跑记录数
+MAX_RUNS = 50
+
+if ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+_local = threading.local()
+_runs: Deque[Dict[str, Any]] = deque(maxlen=MAX_RUNS)
+_runs_lock = threading.Lock()
+
+
+def _traced_bytes() -> int:
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+@contextmanager
+def span(name: str, **args) -> Iterator[None]:
+    """记录一段代码的耗时与内存分配
+
+    Args:
+        name: 分段名称
+        **args: 附加信息，写入 trace 的 args 字段
+    """
+    if not ENABLED:
+        yield
+        return
+
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    record = {
+        'name': name,
+        'args': args,
+        'depth': len(stack),
+        'start_us': time.perf_counter_ns() // 1000,
+        'tid': threading.get_ident(),
+    }
+    if not stack:
+        _local.spans = []
+    stack.append(record)
+    blocks = sys.getallocatedblocks()
+    traced = _traced_bytes()
+    try:
+        yield
+    finally:
+        record['dur_us'] = time.perf_counter_ns() // 1000 - record['start_us']
+        record['alloc_blocks'] = sys.getallocatedblocks() - blocks
+        record['alloc_kb'] = round((_traced_bytes() - traced) / 1024, 1)
+        stack.pop()
+        _local.spans.append(record)
+        if not stack:
+            _finish_run(record, _local.spans)
+
+
+def _finish_run(root: Dict[str, Any], spans: List[Dict[str, Any]]):
+    # 子分段先于父分段结束，按开始时间排回调用顺序
+    spans.sort(key=lambda s: (s['start_us'], s['depth']))
+    run = {
+        'name': root['name'],
+        'time': time.time(),
+        'dur_us': root['dur_us'],
+        'alloc_blocks': root['alloc_blocks'],
+        'spans': spans,
+    }
+    with _runs_lock:
+        _runs.append(run)
+
+
+def profiled(name: Optional[str] = None, record_args: bool = False) -> Callable:
+    """把函数的每次调用记录为一个 span
+
+    Args:
+        name: 分段名称，默认为函数名
+        record_args: 是否把位置参数（截断后）写入 span 附加信息
+    """
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            extra = {'args': [repr(a)[:80] for a in args]} if record_args else {}
+            with span(label, **extra):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def recent_runs() -> List[Dict[str, Any]]:
+    """最近的重跑记录，最新的在最后"""
+    with _runs_lock:
+        return list(_runs)
+
+
+def clear_runs():
+    """清空重跑记录"""
+    with _runs_lock:
+        _runs.clear()
+
+
+def chrome_trace(runs: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """把重跑记录转换为 Chrome trace（Trace Event Format）"""
+    pid = os.getpid()
+    events = []
+    for run in recent_runs() if runs is None else runs:
+        for s in run['spans']:
+            events.append({
+                'name': s['name'],
+                'cat': run['name'],
+                'ph': 'X',
+                'ts': s['start_us'],
+                'dur': s['dur_us'],
+                'pid': pid,
+                'tid': s['tid'],
+                'args': {**s['args'], 'alloc_blocks': s['alloc_blocks'], 'alloc_kb': s['alloc_kb']},
+            })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def export_chrome_trace(path: Path, runs: Optional[List[Dict[str, Any]]] = None) -> Path:
+    """把重跑记录写为 Chrome trace JSON 文件"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(chrome_trace(runs), ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+def _cache_stats() -> Dict[str, Dict[str, Any]]:
+    from utils.consult import check_cache_stats
+    from utils.data_loader import cache_stats, index_cache_stats
+    from utils.ui_components import render_cache_stats
+    return {
+        '数据缓存': cache_stats(),
+        '索引缓存': index_cache_stats(),
+        '病例卡片HTML缓存': render_cache_stats(),
+        '检测结果缓存': check_cache_stats(),
+    }
+
+
+def render_profile_panel():
+    """在侧边栏显示最近一次重跑的分段耗时（未启用时不显示）"""
+    if not ENABLED:
+        return
+    import streamlit as st
+    from utils.data_loader import get_data_path
+
+    runs = recent_runs()
+    with st.sidebar.expander("性能分析", expanded=False):
+        if not runs:
+            st.caption("暂无记录")
+            return
+        last = runs[-1]
+        st.caption(f"最近一次: {last['name']}，{last['dur_us'] / 1000:.1f} ms，"
+                   f"新分配 {last['alloc_blocks']} 个内存块")
+        st.dataframe([{
+            '分段': '　' * s['depth'] + s['name'],
+            '耗时(ms)': round(s['dur_us'] / 1000, 2),
+            '内存块': s['alloc_blocks'],
+            '内存(KB)': s['alloc_kb'],
+        } for s in last['spans']], hide_index=True, use_container_width=True)
+
+        st.markdown("**最近重跑**")
+        st.dataframe([{
+            '重跑': run['name'],
+            '耗时(ms)': round(run['dur_us'] / 1000, 2),
+            '分段数': len(run['spans']),
+        } for run in reversed(runs)], hide_index=True, use_container_width=True)
+
+        st.markdown("**缓存**")
+        st.dataframe([{
+            '缓存': label,
+            '条目': stats['size'],
+            '命中': stats['hits'],
+            '未命中': stats['misses'],
+            '命中率': f"{stats['hit_rate']:.0%}",
+        } for label, stats in _cache_stats().items()], hide_index=True, use_container_width=True)
+
+        if st.button("导出 trace", key="profile_export"):
+            name = time.strftime('trace-%Y%m%d-%H%M%S.json')
+            path = export_chrome_trace(get_data_path("profiles") / name, runs)
+            st.success(f"已写入 {path}")
@@ -0,0 +1,255 @@
+"""检查规则引擎模块
+
+把 order_check_rules.json 编译成一次性构建的匹配结构：
+- 症状关键词 -> Aho-Corasick 多模式自动机，扫描一遍病人文本即可找出全部命中关键词
+- 检查项目 -> 冲突组倒排索引，只访问已选项目涉及的冲突组
+"""
+import hashlib
+import json
+from collections import deque
+from collections.abc import Set as AbstractSet
+from typing import Dict, Iterable, List, Set
+
+
+def _as_set(items: Iterable[str]) -> AbstractSet:
+    """已是集合（含 SelectionState）时直接使用，否则转换为 set"""
+    return items if isinstance(items, AbstractSet) else set(items)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick 多模式匹配自动机"""
+
+    def __init__(self, keywords: Iterable[str]):
+        # 每个状态: 转移表、失败指针、在该状态结束的关键词
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for kw in keywords:
+            if kw:
+                self._insert(kw)
+        self._build_fail_links()
+
+    def _insert(self, keyword: str):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        if keyword not in self._output[state]:
+            self._output[state].append(keyword)
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # 合并后缀状态的输出，匹配时无需再沿失败链回溯
+                self._output[nxt].extend(self._output[self._fail[nxt]])
+
+    def step(self, state: int, ch: str) -> int:
+        """从 state 读入一个字符，返回新状态"""
+        while state and ch not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(ch, 0)
+
+    def outputs(self, state: int) -> List[str]:
+        """返回在 state 结束的全部关键词"""
+        return self._output[state]
+
+    def find_all(self, text: str) -> Set[str]:
+        """扫描文本，返回出现过的关键词集合"""
+        found = set()
+        state = 0
+        for ch in text:
+            state = self.step(state, ch)
+            if self._output[state]:
+                found.update(self._output[state])
+        return found
+
+
+class CompiledRules:
+    """编译后的检查规则（冲突检测 + 遗漏检测）"""
+
+    def __init__(self, rules: Dict):
+        # 规则内容的版本号，用于缓存检测结果
+        self.version = hashlib.sha1(
+            json.dumps(rules, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()[:16]
+        self.conflicts: List[Dict] = list(rules.get('conflicts', []))
+        self.missing_checks: List[Dict] = list(rules.get('missing_checks', []))
+
+        # 检查项目 -> 所属冲突组下标
+        self.item_to_conflicts: Dict[str, List[int]] = {}
+        for idx, conflict in enumerate(self.conflicts):
+            for item in conflict.get('items', []):
+                self.item_to_conflicts.setdefault(item, []).append(idx)
+
+        # 症状关键词 -> 触发的遗漏规则下标
+        self.keyword_to_missing: Dict[str, List[int]] = {}
+        for idx, missing in enumerate(self.missing_checks):
+            for kw in missing.get('symptom_keywords', []):
+                self.keyword_to_missing.setdefault(kw, []).append(idx)
+
+        self.automaton = KeywordAutomaton(self.keyword_to_missing)
+
+    def to_index(self) -> Dict:
+        """可序列化为 JSON 的倒排索引，供构建工具预先生成"""
+        return {
+            'version': self.version,
+            'item_to_conflicts': self.item_to_conflicts,
+            'keyword_to_missing': self.keyword_to_missing,
+        }
+
+    def find_conflicts(self, selected: Iterable[str]) -> List[Dict]:
+        """检查是否同时选择了同一冲突组中的多个项目
+
+        Args:
+            selected: 已选检查项目
+
+        Returns:
+            冲突列表，按规则文件中的顺序排列
+        """
+        selected = _as_set(selected)
+        groups: Set[int] = set()
+        for item in selected:
+            groups.update(self.item_to_conflicts.get(item, ()))
+
+        conflicts_found = []
+        for idx in sorted(groups):
+            conflict = self.conflicts[idx]
+            selected_in_group = [item for item in conflict.get('items', []) if item in selected]
+            if len(selected_in_group) >= 2:
+                conflicts_found.append({
+                    'group': conflict.get('group'),
+                    'items': selected_in_group,
+                    'reason': conflict.get('reason'),
+                    'suggestion': conflict.get('suggestion')
+                })
+        return conflicts_found
+
+    def triggered_missing(self, matched_keywords: Iterable[str]) -> Set[int]:
+        """根据命中的症状关键词返回被触发的遗漏规则下标"""
+        triggered: Set[int] = set()
+        for kw in matched_keywords:
+            triggered.update(self.keyword_to_missing.get(kw, ()))
+        return triggered
+
+    def find_missing(self, selected: Iterable[str], patient_text: str) -> List[Dict]:
+        """检查病人症状提示需要、但尚未选择的项目
+
+        Args:
+            selected: 已选检查项目
+            patient_text: 病人陈述文本
+
+        Returns:
+            遗漏列表，按规则文件中的顺序排列
+        """
+        triggered = self.triggered_missing(self.automaton.find_all(patient_text))
+        return self.missing_from_triggered(selected, triggered)
+
+    def missing_from_triggered(self, selected: Iterable[str], triggered: Iterable[int]) -> List[Dict]:
+        """把已触发的遗漏规则下标转换为结果列表，跳过已选项目"""
+        selected = _as_set(selected)
+        missing_found = []
+        for idx in sorted(triggered):
+            missing = self.missing_checks[idx]
+            item_name = missing.get('missing_item')
+            if item_name not in selected:
+                missing_found.append({
+                    'item': item_name,
+                    'reason': missing.get('reason'),
+                    'priority': missing.get('priority'),
+                    'warning': missing.get('warning')
+                })
+        return missing_found
+
+    def check(self, selected: Iterable[str], patient_text: str) -> Dict[str, List[Dict]]:
+        """同时执行冲突与遗漏检测
+
+        Returns:
+            {'conflicts': [...], 'missing': [...]}
+        """
+        selected = _as_set(selected)
+        return {
+            'conflicts': self.find_conflicts(selected),
+            'missing': self.find_missing(selected, patient_text)
+        }
+
+
+class TranscriptMatcher:
+    """逐条接收对话消息的增量匹配器
+
+    自动机状态在消息之间保留，并在相邻两条病人消息之间补一个分隔符，
+    因此结果与把全部病人消息用 ' ' 拼接后整体匹配完全一致，
+    跨消息边界的关键词也能命中。每次更新只扫描新消息的文本。
+    """
+
+    def __init__(self, rules: CompiledRules, role: str = '病人', separator: str = ' '):
+        self.rules = rules
+        self.role = role
+        self.separator = separator
+        self.message_count = 0
+        self.matched_keywords: Set[str] = set()
+        self.triggered: Set[int] = set()
+        self._state = 0
+        self._has_text = False
+
+    def feed(self, msg: Dict) -> Set[str]:
+        """接收一条对话消息
+
+        Args:
+            msg: 对话消息，含 role/text 字段
+
+        Returns:
+            本条消息新命中的关键词
+        """
+        self.message_count += 1
+        if msg.get('role') != self.role:
+            return set()
+
+        text = msg.get('text', '')
+        if self._has_text:
+            text = self.separator + text
+        self._has_text = True
+
+        automaton = self.rules.automaton
+        new_keywords = set()
+        state = self._state
+        for ch in text:
+            state = automaton.step(state, ch)
+            for kw in automaton.outputs(state):
+                if kw not in self.matched_keywords:
+                    self.matched_keywords.add(kw)
+                    new_keywords.add(kw)
+        self._state = state
+
+        if new_keywords:
+            self.triggered.update(self.rules.triggered_missing(new_keywords))
+        return new_keywords
+
+    def feed_many(self, messages: Iterable[Dict]) -> Set[str]:
+        """依次接收多条消息，返回新命中的关键词"""
+        new_keywords = set()
+        for msg in messages:
+            new_keywords.update(self.feed(msg))
+        return new_keywords
+
+    def missing(self, selected: Iterable[str]) -> List[Dict]:
+        """根据当前累计命中结果返回遗漏检查"""
+        return self.rules.missing_from_triggered(selected, self.triggered)
+
+
+def compile_rules(rules: Dict) -> CompiledRules:
+    """把规则字典编译为 CompiledRules"""
+    return CompiledRules(rules or {})
@@ -0,0 +1,250 @@
+"""评分服务客户端
+
+页面通过本模块调用 utils.scoring_service：
+- 连接池复用 keep-alive 连接，池满时多余的连接直接关闭
+- 每次请求有超时；复用的连接已被服务端关闭时换新连接重试一次
+- 调用失败时返回同一请求上次成功的结果，没有时调用页面提供的本地计算；
+  失败后 retry_after 秒内不再请求服务，避免每次重跑都等待超时
+
+设置环境变量 DOCTOR_MANAGER_SCORING_URL（如 http://127.0.0.1:8765 或
+unix:///tmp/doctor_manager_scoring.sock）后页面才使用评分服务。
+
+压测:
+    python -m utils.scoring_client bench --url http://127.0.0.1:8765 --concurrency 32 --requests 2000
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import queue
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from utils.cache import LRUCache
+from utils.profiling import profiled
+from utils.selection import selection_fingerprint
+
+DEFAULT_TIMEOUT = 0.5
+DEFAULT_POOL_SIZE = 8
+# 调用失败后暂停请求服务的秒数
+DEFAULT_RETRY_AFTER = 10.0
+
+
+class ScoringUnavailable(Exception):
+    """评分服务不可用（连接失败、超时或返回错误）"""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.unix_path)
+        self.sock = sock
+
+
+class ScoringClient:
+    """评分服务客户端（线程安全，各会话共用一个实例）
+
+    Args:
+        url: http://host:port 或 unix:///path/to.sock
+        timeout: 单次请求超时（秒）
+        pool_size: 连接池保留的空闲连接数
+        retry_after: 调用失败后暂停请求服务的秒数
+    """
+
+    def __init__(self, url: str, timeout: float = DEFAULT_TIMEOUT, pool_size: int = DEFAULT_POOL_SIZE,
+                 retry_after: float = DEFAULT_RETRY_AFTER):
+        self.url = url
+        self.timeout = timeout
+        self.retry_after = retry_after
+        parsed = urlparse(url)
+        if parsed.scheme == 'unix':
+            self._connect = lambda: _UnixHTTPConnection(parsed.path, timeout)
+        elif parsed.scheme == 'http':
+            self._connect = lambda: http.client.HTTPConnection(parsed.hostname, parsed.port or 80,
+                                                               timeout=timeout)
+        else:
+            raise ValueError(f"不支持的评分服务地址: {url}")
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+        # 请求 -> 上次成功的结果
+        self._last_results = LRUCache(maxsize=1024)
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self.counts = {'remote': 0, 'cached': 0, 'local': 0, 'errors': 0}
+
+    # === 连接池 ===
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _release(self, conn: http.client.HTTPConnection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        """关闭池中的空闲连接"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def request(self, path: str, payload: Dict) -> Dict:
+        """POST JSON 并返回解析后的响应，失败时抛出 ScoringUnavailable"""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+        for _ in range(2):
+            conn, reused = self._acquire()
+            try:
+                conn.request('POST', path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                # 空闲连接可能已被服务端关闭，换新连接再试一次；超时不重试
+                if reused and not isinstance(e, socket.timeout):
+                    continue
+                raise ScoringUnavailable(f"{path}: {e}") from e
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            if response.status != 200:
+                raise ScoringUnavailable(f"{path}: HTTP {response.status} {data[:200]!r}")
+            try:
+                return json.loads(data)
+            except ValueError as e:
+                raise ScoringUnavailable(f"{path}: 响应不是合法的JSON") from e
+        raise ScoringUnavailable(f"{path}: 连接被关闭")
+
+    def _call(self, path: str, payload: Dict, key: Hashable,
+              fallback: Optional[Callable[[], Any]]) -> Dict:
+        """调用服务；失败时依次使用上次成功的结果、本地计算"""
+        if time.monotonic() >= self._down_until:
+            try:
+                result = self.request(path, payload)
+            except ScoringUnavailable as e:
+                print(f"警告: 评分服务不可用，{self.retry_after:g} 秒内使用缓存或本地结果: {e}")
+                with self._lock:
+                    self._down_until = time.monotonic() + self.retry_after
+                    self.counts['errors'] += 1
+            else:
+                self._last_results.set(key, result)
+                self._count('remote')
+                return result
+        cached = self._last_results.get(key)
+        if cached is not None:
+            self._count('cached')
+            return cached
+        if fallback is None:
+            raise ScoringUnavailable(f"{path}: 服务不可用且没有缓存结果")
+        self._count('local')
+        return fallback()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    # === 接口 ===
+    @profiled('ScoringClient.order_warnings')
+    def order_warnings(self, keywords: Iterable[str], selected: Iterable[str],
+                       fallback: Optional[Callable[[], Dict]] = None) -> Dict[str, List[Dict]]:
+        """检查提醒：{'conflicts': [...], 'missing': [...]}
+
+        Args:
+            keywords: 整段对话中已命中的症状关键词（TranscriptMatcher.matched_keywords）
+            selected: 已选检查项目名称
+            fallback: 服务不可用且没有缓存结果时的本地计算
+        """
+        keywords = sorted(keywords)
+        selected = list(selected)
+        key = ('order_warnings', selection_fingerprint(keywords), selection_fingerprint(selected))
+        return self._call('/v1/order-warnings', {'keywords': keywords, 'selected': selected},
+                          key, fallback)
+
+    @profiled('ScoringClient.similar_cases')
+    def similar_cases(self, text: str, k: int = 5,
+                      fallback: Optional[Callable[[], List[Dict]]] = None) -> List[Dict]:
+        """与文本最相似的 k 个病例"""
+        text_hash = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+        key = ('similar_cases', text_hash, k)
+        local = (lambda: {'cases': fallback()}) if fallback is not None else None
+        return self._call('/v1/similar-cases', {'text': text, 'k': k}, key, local)['cases']
+
+    def health(self) -> Dict:
+        """服务端状态（各接口的请求数与批次统计）"""
+        conn = self._connect()
+        try:
+            conn.request('GET', '/health')
+            return json.loads(conn.getresponse().read())
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise ScoringUnavailable(f"/health: {e}") from e
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """远程调用、缓存回退、本地回退与失败次数"""
+        with self._lock:
+            return {**self.counts, 'idle_connections': self._pool.qsize()}
+
+
+def _bench(client: ScoringClient, concurrency: int, total: int):
+    """并发调用两个接口，统计吞吐与延迟"""
+    texts = [f"最近打喷嚏、鼻痒，清水样鼻涕{i % 50}天" for i in range(total)]
+    symptoms = ['打喷嚏', '鼻痒', '清水样鼻涕', '眼睛痒', '换季', '鼻塞', '咳嗽', '发热']
+    keywords = [symptoms[i % len(symptoms):] for i in range(total)]
+    selected = ['血常规', '过敏原检测']
+
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        if i % 2:
+            client.similar_cases(texts[i], k=5)
+        else:
+            client.order_warnings(keywords[i], selected)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"{total} 次请求，并发 {concurrency}，用时 {elapsed:.2f} 秒，{total / elapsed:.0f} 次/秒")
+    print(f"延迟 p50 {statistics.median(latencies):.1f} ms，"
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms，最大 {latencies[-1]:.1f} ms")
+    print(f"客户端: {client.stats()}")
+    try:
+        health = client.health()
+        for path in ('/v1/order-warnings', '/v1/similar-cases'):
+            print(f"服务端 {path}: {health[path]}")
+    except ScoringUnavailable:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评分服务客户端")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_bench = sub.add_parser('bench', help="压测评分服务")
+    p_bench.add_argument('--url', default='http://127.0.0.1:8765')
+    p_bench.add_argument('--concurrency', type=int, default=32)
+    p_bench.add_argument('--requests', type=int, default=2000)
+    p_bench.add_argument('--timeout', type=float, default=2.0)
+    args = parser.parse_args()
+
+    client = ScoringClient(args.url, timeout=args.timeout, pool_size=args.concurrency)
+    _bench(client, args.concurrency, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""本地评分服务（模型服务的替身）
+
+在单机上模拟页面对模型服务的调用路径：asyncio HTTP 服务（TCP 或 Unix 套接字），
+各会话并发的请求先进入队列，凑满一批或等待超过 max_wait_ms 后一起交给“模型”计算。
+替身模型即现有的规则引擎和相似病例索引：
+- 检查提醒：客户端发送增量匹配器累计命中的症状关键词（与本地检测使用同一份匹配结果），
+  同一批中相同的 (关键词, 已选项目) 只计算一次
+- 相似病例：整批查询与病例向量做一次矩阵乘（未构建索引时返回预置的相似病例）
+
+接口（JSON）:
+    POST /v1/order-warnings  {"keywords": ["..."], "selected": ["..."]} -> {"conflicts": [...], "missing": [...]}
+    POST /v1/similar-cases   {"text": "...", "k": 5} -> {"cases": [...]}
+    GET  /health             -> 各接口的请求数、批次数、平均批大小
+
+启动:
+    python -m utils.scoring_service --port 8765
+    python -m utils.scoring_service --unix /tmp/doctor_manager_scoring.sock
+"""
+import argparse
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.data_loader import load_compiled_rules, load_similar_cases, load_similarity_index
+
+# 每批最多请求数、凑批最长等待（毫秒）
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_WAIT_MS = 5
+# 请求体上限（字节）
+MAX_BODY_BYTES = 1 << 20
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+            500: 'Internal Server Error'}
+
+
+class MicroBatcher:
+    """把并发提交的请求攒成批次，在线程池中调用 handler(批次) 计算
+
+    Args:
+        handler: 接收请求列表、返回等长结果列表的函数
+        max_batch: 每批最多请求数
+        max_wait_ms: 第一条请求到达后最多等待多久凑批
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], List[Any]],
+                 max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.requests = 0
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+
+    async def submit(self, item: Any) -> Any:
+        """提交一条请求，等待所在批次计算完成后返回结果"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _next_batch(self) -> List[Tuple[Any, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            items = [item for item, _ in batch]
+            self.requests += len(items)
+            self.batches += 1
+            try:
+                results = await loop.run_in_executor(None, self.handler, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'avg_batch': self.requests / self.batches if self.batches else 0.0,
+        }
+
+
+def score_order_warnings(requests: List[Dict]) -> List[Dict]:
+    """替身模型：按规则检测冲突与遗漏，同一批中相同的请求只计算一次"""
+    rules = load_compiled_rules()
+    results: Dict[Tuple[frozenset, frozenset], Dict] = {}
+    out = []
+    for request in requests:
+        keywords = frozenset(request.get('keywords') or ())
+        selected = frozenset(request.get('selected') or ())
+        key = (keywords, selected)
+        if key not in results:
+            if rules:
+                triggered = rules.triggered_missing(keywords)
+                results[key] = {
+                    'conflicts': rules.find_conflicts(selected),
+                    'missing': rules.missing_from_triggered(selected, triggered),
+                }
+            else:
+                results[key] = {'conflicts': [], 'missing': []}
+        out.append(results[key])
+    return out
+
+
+def score_similar_cases(requests: List[Dict]) -> List[Dict]:
+    """替身模型：整批检索相似病例；未构建索引时返回预置的相似病例"""
+    ks = [max(1, int(request.get('k') or 5)) for request in requests]
+    index = load_similarity_index()
+    if index is None:
+        cases = load_similar_cases() or []
+        return [{'cases': cases[:k]} for k in ks]
+    hits = index.query_many([request.get('text') or '' for request in requests], max(ks))
+    return [{'cases': cases[:k]} for cases, k in zip(hits, ks)]
+
+
+def _content_length(value: Optional[str]) -> Optional[int]:
+    """解析 Content-Length，缺省为 0；格式错误或为负数时返回 None"""
+    value = (value or '0').strip()
+    if not (value.isascii() and value.isdigit()):
+        return None
+    return int(value)
+
+
+class ScoringServer:
+    """评分服务：HTTP/1.1（支持 keep-alive），每个接口一个批处理队列"""
+
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.batchers = {
+            '/v1/order-warnings': MicroBatcher(score_order_warnings, max_batch, max_wait_ms),
+            '/v1/similar-cases': MicroBatcher(score_similar_cases, max_batch, max_wait_ms),
+        }
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', **{p: b.stats() for p, b in self.batchers.items()}}
+        batcher = self.batchers.get(path)
+        if method != 'POST' or batcher is None:
+            return 404, {'error': f"未知接口 {method} {path}"}
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError as e:
+            return 400, {'error': f"JSON格式错误: {e}"}
+        if not isinstance(payload, dict):
+            return 400, {'error': "请求体应为对象"}
+        try:
+            return 200, await batcher.submit(payload)
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = _content_length(headers.get('content-length'))
+                if length is None:
+                    # 无法确定请求体边界，回复后关闭连接
+                    status, result = 400, {'error': "Content-Length 无效"}
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, result = 413, {'error': "请求体过大"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, result = await self._dispatch(method, path, body)
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:  # 请求行或头部超过 StreamReader 的长度上限
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765, unix: Optional[str] = None,
+                    ready: Optional[Callable[[], Awaitable[None]]] = None):
+        """启动服务直到被取消"""
+        for batcher in self.batchers.values():
+            batcher.start()
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, path=unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        try:
+            async with server:
+                if ready is not None:
+                    await ready()
+                await server.serve_forever()
+        finally:
+            for batcher in self.batchers.values():
+                await batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地评分服务（检查提醒、相似病例）")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="改为监听 Unix 套接字")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    async def _ready():
+        print(f"评分服务已启动: {'unix://' + args.unix if args.unix else f'http://{args.host}:{args.port}'}")
+
+    server = ScoringServer(args.max_batch, args.max_wait_ms)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix, ready=_ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
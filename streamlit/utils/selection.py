@@ -0,0 +1,100 @@
+"""已选检查项目状态模块"""
+import hashlib
+from collections.abc import MutableSet
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+_MASK = (1 << 64) - 1
+
+
+def _item_hash(item: str) -> int:
+    return int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def selection_fingerprint(items: Iterable[str]) -> str:
+    """与顺序无关的选择指纹（与 SelectionState.fingerprint 一致）"""
+    items = set(items)
+    total = sum(_item_hash(item) for item in items) & _MASK
+    return f"{len(items)}:{total:016x}"
+
+
+class SelectionState(MutableSet):
+    """保持选择顺序的集合
+
+    成员判断、添加、删除均为 O(1)，遍历按选择先后顺序；
+    同时记录自上次 checkpoint() 以来的增删变化，并随增删增量维护选择指纹。
+    """
+
+    def __init__(self, items: Iterable[str] = ()):
+        # dict 保持插入顺序，值不使用
+        self._items: Dict[str, None] = dict.fromkeys(items)
+        self._added: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._hash_sum = sum(_item_hash(item) for item in self._items) & _MASK
+        self.version = 0
+
+    def __contains__(self, item) -> bool:
+        return item in self._items
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return f"SelectionState({list(self._items)!r})"
+
+    def add(self, item: str):
+        """添加项目（已存在时不变）"""
+        if item in self._items:
+            return
+        self._items[item] = None
+        self._hash_sum = (self._hash_sum + _item_hash(item)) & _MASK
+        if item in self._removed:
+            self._removed.discard(item)
+        else:
+            self._added.add(item)
+        self.version += 1
+
+    def discard(self, item: str):
+        """删除项目（不存在时不变）"""
+        if item not in self._items:
+            return
+        del self._items[item]
+        self._hash_sum = (self._hash_sum - _item_hash(item)) & _MASK
+        if item in self._added:
+            self._added.discard(item)
+        else:
+            self._removed.add(item)
+        self.version += 1
+
+    def set_selected(self, item: str, selected: bool):
+        """按复选框状态添加或删除"""
+        if selected:
+            self.add(item)
+        else:
+            self.discard(item)
+
+    def clear(self):
+        for item in list(self._items):
+            self.discard(item)
+
+    @property
+    def fingerprint(self) -> str:
+        """与顺序无关的选择指纹，O(1)"""
+        return f"{len(self._items)}:{self._hash_sum:016x}"
+
+    def to_list(self) -> List[str]:
+        """按选择顺序返回列表"""
+        return list(self._items)
+
+    def changes(self) -> Tuple[Set[str], Set[str]]:
+        """自上次 checkpoint() 以来新增、删除的项目"""
+        return set(self._added), set(self._removed)
+
+    def checkpoint(self) -> Tuple[Set[str], Set[str]]:
+        """返回自上次 checkpoint() 以来的变化，并以当前状态作为新的起点"""
+        diff = self.changes()
+        self._added.clear()
+        self._removed.clear()
+        return diff
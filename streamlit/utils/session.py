@@ -0,0 +1,58 @@
+"""Streamlit 会话状态工具模块"""
+import weakref
+from typing import Optional
+
+import streamlit as st
+
+from utils.consult import ConsultSession
+from utils.data_loader import load_compiled_rules, load_transcript
+from utils.rule_engine import CompiledRules
+from utils.selection import SelectionState
+from utils.transcript_stream import TranscriptLog, new_log_path
+
+
+def get_active_patient_id() -> Optional[str]:
+    """当前会话的就诊患者ID
+
+    优先取 session_state，其次取地址栏参数 ?patient_id=；均未设置时返回 None（使用示例数据）。
+    """
+    if 'patient_id' not in st.session_state:
+        st.session_state['patient_id'] = st.query_params.get('patient_id')
+    return st.session_state['patient_id']
+
+
+def get_selection() -> SelectionState:
+    """当前会话的已选检查项目（页面2控件、检查提醒和页面4共用）"""
+    selection = st.session_state.get('selected_items')
+    if not isinstance(selection, SelectionState):
+        selection = SelectionState(selection or [])
+        st.session_state['selected_items'] = selection
+    return selection
+
+
+def _rules_version(rules: Optional[CompiledRules]) -> Optional[str]:
+    return rules.version if rules else None
+
+
+def _new_consult_session(rules: Optional[CompiledRules], patient_id: Optional[str]) -> ConsultSession:
+    log = TranscriptLog(new_log_path(patient_id))
+    session = ConsultSession(rules, patient_id, log=log)
+    # 浏览器会话结束、会话状态被回收时删除对话日志
+    weakref.finalize(session, log.remove)
+    return session
+
+
+def get_consult_session() -> ConsultSession:
+    """获取当前会话的问诊状态，并接收对话中新增的消息"""
+    patient_id = get_active_patient_id()
+    rules = load_compiled_rules()
+    session = st.session_state.get('consult_session')
+    # 切换患者或规则内容变化后需要重新匹配（按版本比较，缓存淘汰后重新编译的相同规则不算变化）
+    if (session is None or session.patient_id != patient_id
+            or _rules_version(session.rules) != _rules_version(rules)):
+        if session is not None:
+            session.close()  # 被替换的会话不再使用，删除其对话日志
+        session = _new_consult_session(rules, patient_id)
+        st.session_state['consult_session'] = session
+    session.sync(load_transcript(patient_id))
+    return session
@@ -0,0 +1,261 @@
+"""相似病例检索索引模块
+
+把病例文本（主诉、现病史、诊断等字段）切成字符 n-gram，哈希到固定维度，
+以 1+log(tf) 加权并做 L2 归一化，得到定长 float32 向量。
+向量按行追加写入磁盘文件，查询时以 np.memmap 映射、分块做矩阵-向量乘并取 top-k，
+内存占用与语料规模无关。查询向量额外乘以 IDF（由文档频次计算）。
+
+目录结构:
+    meta.json       维度、n-gram 范围、病例数
+    vectors.f32     病例向量 (count x dim, float32, 行主序)
+    df.npy          各哈希桶的文档频次
+    records.jsonl   病例原始记录，每行一条
+    offsets.npy     每条记录在 records.jsonl 中的字节偏移，按需随机读取
+
+构建索引:
+    python -m utils.similarity_index build
+"""
+import argparse
+import json
+import math
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 参与相似度计算的病例字段（与 render_case_card 展示的字段一致）
+CASE_FIELDS = (
+    'chief_complaint',
+    'history_present',
+    'history_past',
+    'tcm_diagnosis_info',
+    'physical_exam',
+    'western_diagnosis',
+    'tcm_diagnosis',
+    'auxiliary_exam',
+)
+
+
+def case_text(case: Dict) -> str:
+    """拼接病例中参与检索的字段"""
+    return '\n'.join(str(case.get(field) or '') for field in CASE_FIELDS)
+
+
+class SimilarityIndex:
+    """基于哈希字符 n-gram 的病例向量索引
+
+    Args:
+        path: 索引目录
+        dim: 向量维度（哈希桶数），仅在新建索引时生效
+        ngram_range: 字符 n-gram 长度范围，仅在新建索引时生效
+    """
+
+    CHUNK_ROWS = 65536
+
+    def __init__(self, path: Path, dim: int = 1024, ngram_range: Tuple[int, int] = (1, 2)):
+        self.path = Path(path)
+        meta_file = self.path / 'meta.json'
+        if meta_file.exists():
+            meta = json.loads(meta_file.read_text(encoding='utf-8'))
+            self.dim = meta['dim']
+            self.ngram_range = tuple(meta['ngram_range'])
+            self.count = meta['count']
+            self.df = np.load(self.path / 'df.npy')
+            self._offsets = np.load(self.path / 'offsets.npy')
+        else:
+            self.dim = dim
+            self.ngram_range = tuple(ngram_range)
+            self.count = 0
+            self.df = np.zeros(dim, dtype=np.int64)
+            self._offsets = np.empty(0, dtype=np.int64)
+        self._vectors: Optional[np.memmap] = None
+
+    @classmethod
+    def exists(cls, path: Path) -> bool:
+        return (Path(path) / 'meta.json').exists()
+
+    # === 向量化 ===
+    def _hashed_counts(self, text: str) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        lo, hi = self.ngram_range
+        for n in range(lo, hi + 1):
+            for i in range(len(text) - n + 1):
+                gram = text[i:i + n]
+                if gram.isspace():
+                    continue
+                bucket = zlib.crc32(gram.encode('utf-8')) % self.dim
+                counts[bucket] = counts.get(bucket, 0) + 1
+        return counts
+
+    def vectorize(self, texts: List[str]) -> np.ndarray:
+        """把一批文本转换为 L2 归一化的向量矩阵"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, tf in self._hashed_counts(text).items():
+                matrix[row, bucket] = 1.0 + math.log(tf)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def idf(self) -> np.ndarray:
+        return np.log((1.0 + self.count) / (1.0 + self.df)).astype(np.float32) + 1.0
+
+    # === 写入 ===
+    def add(self, cases: Iterable[Dict], batch_size: int = 4096) -> int:
+        """追加病例（可用于批量构建与增量添加）
+
+        Returns:
+            本次追加的病例数
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        added = 0
+        batch: List[Dict] = []
+        for case in cases:
+            batch.append(case)
+            if len(batch) >= batch_size:
+                added += self._append_batch(batch)
+                batch = []
+        if batch:
+            added += self._append_batch(batch)
+        self._save_meta()
+        return added
+
+    def _append_batch(self, cases: List[Dict]) -> int:
+        vectors = self.vectorize([case_text(c) for c in cases])
+        self.df += (vectors > 0).sum(axis=0)
+        with open(self.path / 'vectors.f32', 'ab') as f:
+            f.write(vectors.tobytes())
+        offsets = []
+        with open(self.path / 'records.jsonl', 'ab') as f:
+            for case in cases:
+                offsets.append(f.tell())
+                f.write(json.dumps(case, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._offsets = np.concatenate([self._offsets, np.asarray(offsets, dtype=np.int64)])
+        self.count += len(cases)
+        self._vectors = None
+        return len(cases)
+
+    def _save_meta(self):
+        np.save(self.path / 'df.npy', self.df)
+        np.save(self.path / 'offsets.npy', self._offsets)
+        meta = {'dim': self.dim, 'ngram_range': list(self.ngram_range), 'count': self.count}
+        (self.path / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+
+    # === 查询 ===
+    def _matrix(self) -> np.ndarray:
+        if self._vectors is None:
+            self._vectors = np.memmap(self.path / 'vectors.f32', dtype=np.float32,
+                                      mode='r', shape=(self.count, self.dim))
+        return self._vectors
+
+    def get_record(self, idx: int) -> Dict:
+        """按行号读取病例原始记录"""
+        with open(self.path / 'records.jsonl', 'rb') as f:
+            f.seek(int(self._offsets[idx]))
+            return json.loads(f.readline())
+
+    def search(self, text: str, k: int = 5) -> List[Tuple[int, float]]:
+        """返回与文本最相似的 k 个病例 (行号, 相似度)，按相似度降序"""
+        return self.search_many([text], k)[0]
+
+    def search_many(self, texts: List[str], k: int = 5) -> List[List[Tuple[int, float]]]:
+        """批量检索：每块病例向量只读取一次，与所有查询向量做一次矩阵乘"""
+        if self.count == 0 or not texts:
+            return [[] for _ in texts]
+        queries = self.vectorize(list(texts)) * self.idf()
+        norms = np.linalg.norm(queries, axis=1)
+        valid = norms > 0
+        queries[valid] /= norms[valid, None]
+
+        k = min(k, self.count)
+        m = len(queries)
+        matrix = self._matrix()
+        best_idx = np.empty((m, 0), dtype=np.int64)
+        best_scores = np.empty((m, 0), dtype=np.float32)
+        for start in range(0, self.count, self.CHUNK_ROWS):
+            scores = (matrix[start:start + self.CHUNK_ROWS] @ queries.T).T
+            if scores.shape[1] > k:
+                top = np.argpartition(scores, -k, axis=1)[:, -k:]
+            else:
+                top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+            best_idx = np.concatenate([best_idx, top + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(best_scores, -k, axis=1)[:, -k:]
+                best_idx = np.take_along_axis(best_idx, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        results = []
+        for row in range(m):
+            if not valid[row]:
+                results.append([])
+                continue
+            results.append([(int(best_idx[row, i]), float(best_scores[row, i])) for i in order[row]])
+        return results
+
+    def query(self, text: str, k: int = 5) -> List[Dict]:
+        """返回最相似的 k 个病例记录，similarity 字段为实时计算的相似度"""
+        return self.query_many([text], k)[0]
+
+    def query_many(self, texts: List[str], k: int = 5) -> List[List[Dict]]:
+        """批量检索，返回每条文本最相似的 k 个病例记录"""
+        results = []
+        for hits in self.search_many(texts, k):
+            cases = []
+            for idx, score in hits:
+                case = self.get_record(idx)
+                case['similarity'] = round(score, 2)
+                cases.append(case)
+            results.append(cases)
+        return results
+
+
+def build_index(path: Path, cases: Iterable[Dict], dim: int = 1024,
+                batch_size: int = 4096) -> SimilarityIndex:
+    """在空目录中批量构建索引（已有索引会被覆盖）"""
+    path = Path(path)
+    for name in ('meta.json', 'vectors.f32', 'df.npy', 'records.jsonl', 'offsets.npy'):
+        (path / name).unlink(missing_ok=True)
+    index = SimilarityIndex(path, dim=dim)
+    index.add(cases, batch_size=batch_size)
+    return index
+
+
+def _iter_cases(source: Path) -> Iterable[Dict]:
+    """读取 .json（列表）或 .jsonl（每行一条）病例文件"""
+    if source.suffix == '.jsonl':
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def main():
+    from utils.data_loader import get_case_index_path, get_data_path
+
+    parser = argparse.ArgumentParser(description="相似病例索引工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help="从病例文件批量构建索引")
+    p_build.add_argument('--source', type=Path, default=get_data_path('similar_cases.json'))
+    p_build.add_argument('--index', type=Path, default=get_case_index_path())
+    p_build.add_argument('--dim', type=int, default=1024)
+    p_add = sub.add_parser('add', help="向已有索引追加病例")
+    p_add.add_argument('source', type=Path)
+    p_add.add_argument('--index', type=Path, default=get_case_index_path())
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        index = build_index(args.index, _iter_cases(args.source), dim=args.dim)
+    else:
+        index = SimilarityIndex(args.index)
+        index.add(_iter_cases(args.source))
+    print(f"索引 {args.index} 共 {index.count} 条病例")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""问诊对话流式接收模块
+
+- 最近若干条消息保存在定长环形缓冲区（collections.deque），供“最近对话”视图使用
+- 全部消息追加写入磁盘上的 JSONL 日志，按字节偏移分页读取，供病历页翻阅
+- ingest / aingest 以生成器（异步生成器）形式逐条接收消息
+"""
+import json
+import tempfile
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Deque, Dict, Iterable, Iterator, List, Optional
+
+# 对话日志默认目录（系统临时目录下）
+LOG_DIR = Path(tempfile.gettempdir()) / "doctor_manager" / "transcripts"
+
+
+class TranscriptLog:
+    """仅追加的对话日志（JSONL）
+
+    只在内存中保存每行的字节偏移，读取时按页 seek，不需要解析整份日志。
+
+    Args:
+        path: 日志文件路径，已存在时在其后继续追加
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._offsets: List[int] = []
+        if self.path.exists():
+            with open(self.path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    self._offsets.append(offset)
+                    offset += len(line)
+        self._end = self.path.stat().st_size if self.path.exists() else 0
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, msg: Dict):
+        """追加一条消息"""
+        line = json.dumps(msg, ensure_ascii=False).encode('utf-8') + b'\n'
+        with open(self.path, 'ab') as f:
+            f.write(line)
+        self._offsets.append(self._end)
+        self._end += len(line)
+
+    def iter_messages(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """按顺序逐条读取 [start, stop) 范围内的消息"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offsets[start])
+            for _ in range(stop - start):
+                yield json.loads(f.readline())
+
+    def page_count(self, page_size: int) -> int:
+        return max(1, -(-len(self) // page_size))
+
+    def read_page(self, page: int, page_size: int = 50) -> List[Dict]:
+        """读取第 page 页（从 0 开始）的消息"""
+        start = page * page_size
+        return list(self.iter_messages(start, start + page_size))
+
+    def remove(self):
+        """删除日志文件（可重复调用）"""
+        self.path.unlink(missing_ok=True)
+        self._offsets = []
+        self._end = 0
+
+
+def new_log_path(patient_id: Optional[str] = None) -> Path:
+    """为一次问诊生成独立的日志文件路径"""
+    return LOG_DIR / f"{patient_id or 'demo'}-{uuid.uuid4().hex[:12]}.jsonl"
+
+
+def ingest(messages: Iterable[Dict], buffer: Deque[Dict],
+           log: Optional[TranscriptLog] = None) -> Iterator[Dict]:
+    """逐条接收消息：写入日志、放入环形缓冲区，并把消息交给调用方继续处理
+
+    Args:
+        messages: 消息来源（任意可迭代对象，可为实时生成器）
+        buffer: 定长环形缓冲区，满后自动丢弃最旧的消息
+        log: 对话日志，None 表示不落盘
+
+    Yields:
+        接收到的消息
+    """
+    for msg in messages:
+        if log is not None:
+            log.append(msg)
+        buffer.append(msg)
+        yield msg
+
+
+async def aingest(messages: AsyncIterable[Dict], buffer: Deque[Dict],
+                  log: Optional[TranscriptLog] = None) -> AsyncIterator[Dict]:
+    """ingest 的异步版本，用于语音转写等异步消息来源"""
+    async for msg in messages:
+        if log is not None:
+            log.append(msg)
+        buffer.append(msg)
+        yield msg
+
+
+def recent_buffer(capacity: int = 20) -> Deque[Dict]:
+    """创建最近消息的环形缓冲区"""
+    return deque(maxlen=capacity)
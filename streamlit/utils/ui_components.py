@@ -1,11 +1,20 @@
-"""可复用UI组件模块"""
+"""可复用UI组件模块
+
+相似病例卡片整张生成一段 HTML，并按卡片内容缓存（functools.lru_cache），
+整页重跑时相同病例直接复用；命中率由 render_cache_stats() 报告。
+"""
+import functools
+import html
 import streamlit as st
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from utils.profiling import profiled
+from utils.selection import SelectionState
+from utils.session import get_selection
+from utils.workflow import paginate
 
-def apply_custom_css():
-    """应用自定义CSS样式"""
-    st.markdown("""
+# 自定义样式表，模块加载时构建一次
+CUSTOM_CSS = """
     <style>
     /* 全局样式 - 强制全宽 */
     .main {
@@ -293,9 +302,19 @@ def apply_custom_css():
         80%, 100% { content: ''; }
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
 
 
+def apply_custom_css():
+    """应用自定义CSS样式
+
+    Streamlit 每次重跑会移除未重新输出的元素，因此样式仍需每次输出；
+    这里只输出预先构建好的常量，不再重新拼接。
+    """
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+
+@profiled()
 def render_patient_card(patient: Dict):
     """渲染患者信息卡片"""
     st.markdown(f"""
@@ -335,6 +354,7 @@ def render_patient_card(patient: Dict):
     """, unsafe_allow_html=True)
 
 
+@profiled()
 def render_progress_steps(current_page: str):
     """渲染进度条"""
     steps = [
@@ -368,41 +388,179 @@ def render_badge(text: str, badge_type: str = "info") -> str:
     return f'<span class="badge badge-{badge_type}">{text}</span>'
 
 
+# 相似病例卡片的字段顺序及标签
+CASE_FIELDS = (
+    ('chief_complaint', "主诉:"),
+    ('history_present', "现病史:"),
+    ('history_past', "既往史:"),
+    ('tcm_diagnosis_info', "中医四诊:"),
+    ('physical_exam', "体格检查:"),
+    ('vital_signs', "生命体征:"),
+    ('western_diagnosis', "西医诊断:"),
+    ('tcm_diagnosis', "中医诊断:"),
+    ('auxiliary_exam', "辅助检查:"),
+    ('prescription', "药品处方:"),
+    ('advice', "建议:"),
+    ('treatment_effect', "治疗效果:"),
+)
+
+
+def _escape(text: Any) -> str:
+    return html.escape(str(text)).replace('\n', '<br>')
+
+
+@functools.lru_cache(maxsize=256)
+def _case_card_html(header: str, rows: Tuple[Tuple[str, str], ...]) -> str:
+    """相似病例卡片 HTML，按卡片内容缓存"""
+    cells = ''.join(
+        f'<div style="font-weight: 600;">{label}</div><div>{_escape(value)}</div>'
+        for label, value in rows
+    )
+    # 整张卡片是一个元素（原先每个字段占两列共两个元素），整页重跑时前端需比对的元素少得多
+    return (
+        '<div style="border: 1px solid rgba(49, 51, 63, 0.2); border-radius: 0.5rem; padding: 1rem;">'
+        f'<div style="font-weight: 600;">{_escape(header)}</div>'
+        '<hr style="margin: 0.75rem 0;">'
+        '<div style="display: grid; grid-template-columns: 1fr 5fr; gap: 0.5rem 1rem;">'
+        f'{cells}</div></div>'
+    )
+
+
+def render_cache_stats() -> Dict[str, Any]:
+    """返回相似病例卡片 HTML 缓存的条目数与命中/未命中计数"""
+    info = _case_card_html.cache_info()
+    total = info.hits + info.misses
+    return {
+        'size': info.currsize,
+        'hits': info.hits,
+        'misses': info.misses,
+        'hit_rate': info.hits / total if total else 0.0,
+    }
+
+
+@profiled()
 def render_case_card(case: Dict):
-    """渲染相似病例卡片 - 标准病历格式（使用原生Streamlit组件）"""
-    # 头部信息
-    header_text = f"姓名:{case.get('patient_name', 'N/A')}　　性别:{case.get('gender', 'N/A')}　　年龄:{case.get('age', 'N/A')}　　门诊号:{case.get('case_id', 'N/A')}　　就诊科室:{case.get('department', 'N/A')}　　相似度:{case.get('similarity', 0):.2f}"
-    
+    """渲染相似病例卡片 - 标准病历格式（相同病例重跑时复用已生成的 HTML）"""
+    header = (f"姓名:{case.get('patient_name', 'N/A')}　　性别:{case.get('gender', 'N/A')}　　"
+              f"年龄:{case.get('age', 'N/A')}　　门诊号:{case.get('case_id', 'N/A')}　　"
+              f"就诊科室:{case.get('department', 'N/A')}　　相似度:{case.get('similarity', 0):.2f}")
+    rows = tuple((label, str(case.get(key, 'N/A'))) for key, label in CASE_FIELDS)
+    st.markdown(_case_card_html(header, rows), unsafe_allow_html=True)
+
+
+# 页面1 录音状态指示
+STATUS_PANEL_HTML = """
+    <div class="status-panel">
+        <div style="display: flex; align-items: center;">
+            <span class="recording-dot"></span>
+            <span style="font-weight: 600; color: #ff4b4b;">实时录音中...</span>
+        </div>
+        <div class="searching-text">
+            <span class="searching-dots"></span>
+        </div>
+    </div>
+    """
+
+
+def render_status_panel():
+    """渲染录音状态指示区"""
+    st.markdown(STATUS_PANEL_HTML, unsafe_allow_html=True)
+
+
+def _toggle_order(name: str, widget_key: str):
+    """复选框回调：同步已选检查"""
+    get_selection().set_selected(name, st.session_state[widget_key])
+
+
+def clear_order_selection():
+    """清空已选检查，并重置对应复选框的状态"""
+    selection = get_selection()
+    for name in selection.to_list():
+        st.session_state.pop(f"check_{name}", None)
+    selection.clear()
+    selection.checkpoint()
+
+
+def _set_grid_page(page_key: str, page: int):
+    st.session_state[page_key] = page
+
+
+def _render_order_item(order: Dict, selected: SelectionState):
+    """渲染单个检查项目（复选框 + 名称）"""
+    # 按项目名称选择：检查规则、冲突检测和病历辅助检查都以名称比较
+    name = order.get('order_name', '')
+    widget_key = f"check_{name}"
+    # 使用容器包裹每一行，增加视觉层级
     with st.container(border=True):
-        st.markdown(f"**{header_text}**")
-        st.divider()
-        
-        # 使用两列布局展示病历内容
-        col1, col2 = st.columns([1, 4])
-        
-        fields = [
-            ("主诉:", case.get('chief_complaint', 'N/A')),
-            ("现病史:", case.get('history_present', 'N/A')),
-            ("既往史:", case.get('history_past', 'N/A')),
-            ("中医四诊:", case.get('tcm_diagnosis_info', 'N/A')),
-            ("体格检查:", case.get('physical_exam', 'N/A')),
-            ("生命体征:", case.get('vital_signs', 'N/A')),
-            ("西医诊断:", case.get('western_diagnosis', 'N/A')),
-            ("中医诊断:", case.get('tcm_diagnosis', 'N/A')),
-            ("辅助检查:", case.get('auxiliary_exam', 'N/A')),
-            ("药品处方:", case.get('prescription', 'N/A')),
-            ("建议:", case.get('advice', 'N/A')),
-            ("治疗效果:", case.get('treatment_effect', 'N/A')),
-        ]
-        
-        for label, value in fields:
-            c1, c2 = st.columns([1, 5])
-            with c1:
-                st.markdown(f"**{label}**")
-            with c2:
-                st.markdown(value)
+        # 调整列比例，让复选框更紧凑，右侧增加Tag位置
+        col_check, col_info, col_tag = st.columns([0.5, 7, 1.5])
+
+        with col_check:
+            # 使用空的markdown调整垂直对齐
+            st.markdown('<div style="height: 6px;"></div>', unsafe_allow_html=True)
+            st.checkbox(
+                "选",
+                value=name in selected,
+                key=widget_key,
+                label_visibility="hidden",
+                on_change=_toggle_order,
+                args=(name, widget_key)
+            )
+
+        with col_info:
+            # 优化排版：加大加粗名称，理由用灰色小字
+            st.markdown(f"<div style='font-size: 1.05rem; font-weight: 600; color: #1f2937;'>{name}</div>", unsafe_allow_html=True)
+
+        with col_tag:
+            st.markdown('<div style="height: 4px;"></div>', unsafe_allow_html=True)
+
+
+@profiled()
+def render_order_grid(orders: List[Dict], page_size: int = 20, columns: int = 2,
+                      key: str = "order_grid", reset_token: Any = None):
+    """分页渲染检查项目网格
+
+    每次重跑只创建当前页的控件，耗时与检查目录大小无关。
+    已选项目按 order_name 保存在会话的 SelectionState 中，翻页或筛选后保持不变。
+
+    Args:
+        orders: 已排序、筛选后的检查项目
+        page_size: 每页项目数
+        columns: 每行列数
+        key: 控件状态键前缀，同一页面多个网格时需区分
+        reset_token: 变化时回到第一页（例如搜索词）
+    """
+    page_key = f"{key}_page"
+    token_key = f"{key}_token"
+    if st.session_state.get(token_key) != reset_token:
+        st.session_state[token_key] = reset_token
+        st.session_state[page_key] = 0
+
+    current = paginate(orders, st.session_state.get(page_key, 0), page_size)
+    page, page_count = current['page'], current['page_count']
+    st.session_state[page_key] = page
+
+    selected = get_selection()
+    window = current['orders']
+    for row_start in range(0, len(window), columns):
+        cols = st.columns(columns)
+        for col, order in zip(cols, window[row_start:row_start + columns]):
+            with col:
+                _render_order_item(order, selected)
+
+    if page_count > 1:
+        col_prev, col_info, col_next = st.columns([1, 3, 1])
+        with col_prev:
+            st.button("上一页", key=f"{key}_prev", disabled=page == 0, use_container_width=True,
+                      on_click=_set_grid_page, args=(page_key, page - 1))
+        with col_info:
+            st.markdown(f"<div style='text-align: center; color: #666;'>第 {page + 1} / {page_count} 页</div>", unsafe_allow_html=True)
+        with col_next:
+            st.button("下一页", key=f"{key}_next", disabled=page >= page_count - 1, use_container_width=True,
+                      on_click=_set_grid_page, args=(page_key, page + 1))
 
 
+@profiled()
 def render_abnormal_card(item: Dict):
     """渲染异常指标卡片"""
     st.markdown(f"""
@@ -419,6 +577,7 @@ def render_abnormal_card(item: Dict):
     """, unsafe_allow_html=True)
 
 
+@profiled()
 def render_reference_card(reference: Dict, quote: str):
     """渲染引用卡片"""
     st.markdown(f"""
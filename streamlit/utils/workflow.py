@@ -0,0 +1,110 @@
+"""页面业务逻辑模块
+
+四个页面中与界面无关的部分：检查项目分页、检查提醒整理、病历辅助线索、检验指标趋势。
+输入输出为普通字典（字段以 TypedDict 标注），本模块不依赖 Streamlit 或 pandas，
+导入时也不加载 numpy，可在脚本、批量工具和基准测试中直接调用；页面只负责渲染结果。
+"""
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, TypedDict
+
+if TYPE_CHECKING:
+    from utils.consult import ConsultSession
+    from utils.lab_history import LabHistory
+    from utils.scoring_client import ScoringClient
+
+# 遗漏检查的优先级排序
+PRIORITY_RANK = {'高': 1, '中': 2, '低': 3}
+# 病历页关键线索最多条数
+MAX_KEY_FINDINGS = 6
+
+
+class OrderPage(TypedDict):
+    orders: List[Dict]
+    total: int
+    page: int
+    page_count: int
+
+
+class OrderWarnings(TypedDict):
+    conflicts: List[Dict]
+    missing: List[Dict]
+    has_issues: bool
+
+
+class LabTrends(TypedDict):
+    summaries: List[Dict]
+    trending: List[str]
+
+
+def paginate(orders: Sequence[Dict], page: int, page_size: int) -> OrderPage:
+    """取出第 page 页（从 0 开始，超出范围时取最后一页）"""
+    page_count = max(1, -(-len(orders) // page_size))
+    page = min(max(page, 0), page_count - 1)
+    return {
+        'orders': list(orders[page * page_size:(page + 1) * page_size]),
+        'total': len(orders),
+        'page': page,
+        'page_count': page_count,
+    }
+
+
+def sort_missing(missing: Iterable[Dict]) -> List[Dict]:
+    """遗漏检查按优先级（高、中、低）排序"""
+    return sorted(missing, key=lambda x: PRIORITY_RANK.get(x.get('priority', '低'), 4))
+
+
+def order_warnings(consult: "ConsultSession", selected: Iterable[str],
+                   client: Optional["ScoringClient"] = None) -> OrderWarnings:
+    """检查提醒：冲突项目与按优先级排序的遗漏检查
+
+    Args:
+        consult: 问诊会话（含编译后的规则与已累计的对话匹配结果）
+        selected: 已选检查项目名称
+        client: 评分服务客户端，None 时在本地计算；服务不可用时回退到本地计算
+    """
+    if client is None or not consult.matcher:
+        results = consult.check_orders(selected)
+    else:
+        # 发送整段对话的累计命中关键词，服务端结果与本地检测一致
+        results = client.order_warnings(consult.matcher.matched_keywords, selected,
+                                        fallback=lambda: consult.check_orders(selected))
+    conflicts = list(results['conflicts'])
+    missing = sort_missing(results['missing'])
+    return {
+        'conflicts': conflicts,
+        'missing': missing,
+        'has_issues': bool(conflicts or missing),
+    }
+
+
+def key_findings(support: Optional[Dict], abnormal_summary: Optional[Dict],
+                 detected: Iterable[Dict], limit: int = MAX_KEY_FINDINGS) -> List[str]:
+    """病历页关键线索：辅助参考中的关键检查在前，其后为异常指标，去重并限额
+
+    Args:
+        support: 辅助参考（sidebar_support）
+        abnormal_summary: 人工整理的异常汇总，其中的异常项排在自动检出项之前
+        detected: 从检验结果中自动检出的异常项
+        limit: 最多条数
+    """
+    # abnormal_detection 依赖 numpy，用到时再导入
+    from utils.abnormal_detection import merge_abnormal_items
+
+    items = merge_abnormal_items((abnormal_summary or {}).get('abnormal_items', []), detected)
+    findings = list((support or {}).get('key_tests', []))
+    findings.extend(f"{item['name']}: {item['value']}" for item in items)
+    return list(dict.fromkeys(findings))[:limit]
+
+
+def lab_trends(history: "LabHistory", patient_id: str, last_n: int) -> LabTrends:
+    """各指标最近 last_n 次结果的统计，以及有多次结果、可画趋势的指标"""
+    summaries = [s for s in (history.summary(patient_id, item, last_n)
+                             for item in history.analytes(patient_id)) if s]
+    return {
+        'summaries': summaries,
+        'trending': [s['item'] for s in summaries if s['count'] > 1],
+    }
+
+
+def dialogue_text(messages: Iterable[Dict[str, Any]]) -> str:
+    """对话原文，每条消息一段"""
+    return "\n\n".join(msg.get('text', '') for msg in messages)
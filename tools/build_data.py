@@ -0,0 +1,202 @@
+"""示例数据构建工具
+
+以 streamlit/data 为唯一数据源：
+1. 校验各 JSON 数据集的结构
+2. 把数据集同步到 web/data（逐文件加载的回退路径仍然可用）
+3. 生成压缩后的单文件数据包 web/data/bundle.<内容哈希>.json（可选 .gz/.br），
+   内含预先生成的检索与规则索引；web/index.html 的 data-bundle 标签指向该文件，
+   首次加载只需一次请求，文件名随内容变化
+4. 生成 streamlit/data/search_index.json（拼音首字母），未安装 pypinyin 时页面2使用
+
+用法:
+    python tools/build_data.py              # 校验并构建
+    python tools/build_data.py --check      # 只校验
+    python tools/build_data.py --gzip --brotli
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCE_DIR = ROOT / "streamlit" / "data"
+WEB_DIR = ROOT / "web"
+WEB_DATA_DIR = WEB_DIR / "data"
+
+sys.path.insert(0, str(ROOT / "streamlit"))
+
+from utils.order_search import OrderSearchIndex  # noqa: E402
+from utils.rule_engine import compile_rules  # noqa: E402
+
+# 数据集 -> (顶层类型, 列表元素或字典本身必须包含的字段)
+DATASETS = {
+    'patient.json': (dict, ('patient_id', 'name', 'gender', 'age')),
+    'transcript.json': (list, ('role', 'text')),
+    'similar_cases.json': (list, ('case_id',)),
+    'orders_ranked.json': (list, ('order_name',)),
+    'order_check_rules.json': (dict, ('conflicts', 'missing_checks')),
+    'sidebar_support.json': (dict, ()),
+    'abnormal_summary.json': (dict, ('abnormal_items',)),
+}
+
+BUNDLE_META = re.compile(r'\s*<meta name="data-bundle" content="[^"]*" />\n')
+
+
+def validate(name: str, data: Any) -> List[str]:
+    """返回该数据集的结构错误"""
+    expected_type, fields = DATASETS[name]
+    if not isinstance(data, expected_type):
+        return [f"{name}: 顶层应为 {expected_type.__name__}"]
+    records = data if isinstance(data, list) else [data]
+    errors = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append(f"{name}[{i}]: 应为对象")
+            continue
+        missing = [field for field in fields if field not in record]
+        if missing:
+            errors.append(f"{name}[{i}]: 缺少字段 {', '.join(missing)}")
+    if name == 'order_check_rules.json' and not errors:
+        for i, conflict in enumerate(data['conflicts']):
+            if len(conflict.get('items', [])) < 2:
+                errors.append(f"{name}: conflicts[{i}] 至少需要两个项目")
+        for i, missing in enumerate(data['missing_checks']):
+            if not missing.get('missing_item') or not missing.get('symptom_keywords'):
+                errors.append(f"{name}: missing_checks[{i}] 缺少 missing_item 或 symptom_keywords")
+    return errors
+
+
+def load_sources() -> Dict[str, Any]:
+    """读取并校验全部数据集，有错误时退出"""
+    datasets, errors = {}, []
+    for name in DATASETS:
+        path = SOURCE_DIR / name
+        try:
+            datasets[name] = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError) as e:
+            errors.append(f"{name}: {e}")
+            continue
+        errors.extend(validate(name, datasets[name]))
+    if errors:
+        for error in errors:
+            print(f"错误: {error}", file=sys.stderr)
+        sys.exit(1)
+    return datasets
+
+
+def build_indexes(datasets: Dict[str, Any]) -> Dict[str, Any]:
+    """预先生成的检索与规则索引"""
+    orders = datasets['orders_ranked.json']
+    search = OrderSearchIndex(orders)
+    # 按 order 排序后的原始下标，前端无需每次排序
+    position = {id(order): i for i, order in enumerate(orders)}
+    return {
+        'orders': {
+            'sorted': [position[id(order)] for order in search.orders],
+            'pinyin': search.pinyin_map(),
+        },
+        'rules': compile_rules(datasets['order_check_rules.json']).to_index(),
+    }
+
+
+def minify(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_bundle(datasets: Dict[str, Any], indexes: Dict[str, Any],
+                 use_gzip: bool, use_brotli: bool) -> str:
+    """写出数据包和 manifest.json，返回数据包文件名
+
+    数据包与 manifest.json 都带各数据集的内容哈希，页面用缓存的数据包渲染后，
+    只需重新验证 manifest.json 即可知道哪些数据集有更新。
+    """
+    hashes = {name[:-len('.json')]: hashlib.sha256(minify(data)).hexdigest()[:12]
+              for name, data in datasets.items()}
+    payload = minify({
+        'datasets': {name[:-len('.json')]: data for name, data in datasets.items()},
+        'hashes': hashes,
+        'indexes': indexes,
+    })
+    digest = hashlib.sha256(payload).hexdigest()[:12]
+    bundle_name = f"bundle.{digest}.json"
+
+    for old in WEB_DATA_DIR.glob("bundle.*.json*"):
+        if not old.name.startswith(bundle_name):
+            old.unlink()
+    (WEB_DATA_DIR / bundle_name).write_bytes(payload)
+    sizes = {'json': len(payload)}
+    if use_gzip:
+        compressed = gzip.compress(payload, compresslevel=9, mtime=0)
+        (WEB_DATA_DIR / f"{bundle_name}.gz").write_bytes(compressed)
+        sizes['gzip'] = len(compressed)
+    if use_brotli:
+        try:
+            import brotli
+        except ImportError:
+            print("警告: 未安装 brotli，跳过 .br 输出", file=sys.stderr)
+        else:
+            compressed = brotli.compress(payload, quality=11)
+            (WEB_DATA_DIR / f"{bundle_name}.br").write_bytes(compressed)
+            sizes['brotli'] = len(compressed)
+
+    manifest = {
+        'bundle': bundle_name,
+        'hash': digest,
+        'sizes': sizes,
+        'datasets': hashes,
+    }
+    (WEB_DATA_DIR / "manifest.json").write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    return bundle_name
+
+
+def sync_web_copies():
+    """web/data 中的逐文件副本与数据源保持一致"""
+    for name in DATASETS:
+        source = (SOURCE_DIR / name).read_bytes()
+        target = WEB_DATA_DIR / name
+        if not target.exists() or target.read_bytes() != source:
+            target.write_bytes(source)
+
+
+def update_index_html(bundle_name: str):
+    """让 index.html 的 data-bundle 标签指向新数据包"""
+    path = WEB_DIR / "index.html"
+    html = BUNDLE_META.sub('\n', path.read_text(encoding='utf-8'), count=1)
+    tag = f'  <meta name="data-bundle" content="data/{bundle_name}" />\n'
+    html = html.replace('  <link rel="stylesheet"', tag + '  <link rel="stylesheet"', 1)
+    path.write_text(html, encoding='utf-8')
+
+
+def write_search_index(indexes: Dict[str, Any]):
+    path = SOURCE_DIR / "search_index.json"
+    path.write_text(json.dumps({'pinyin': indexes['orders']['pinyin']}, ensure_ascii=False, indent=2) + '\n',
+                    encoding='utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="校验示例数据并生成前端数据包")
+    parser.add_argument('--check', action='store_true', help="只校验，不写出")
+    parser.add_argument('--gzip', action='store_true', help="同时写出 .gz 预压缩文件")
+    parser.add_argument('--brotli', action='store_true', help="同时写出 .br 预压缩文件（需安装 brotli）")
+    args = parser.parse_args()
+
+    datasets = load_sources()
+    print(f"已校验 {len(datasets)} 个数据集")
+    if args.check:
+        return
+
+    indexes = build_indexes(datasets)
+    sync_web_copies()
+    bundle_name = write_bundle(datasets, indexes, args.gzip, args.brotli)
+    update_index_html(bundle_name)
+    write_search_index(indexes)
+    print(f"数据包: web/data/{bundle_name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""页面冷启动耗时检查
+
+每个页面在独立的子进程中冷启动（先导入 streamlit，不计入耗时），分两个阶段测量：
+- import：页面以非 __main__ 名称执行，只运行模块级代码；此阶段不应加载任何重量级依赖
+- first_view：页面以 __main__ 在 bare 模式下执行，与首次打开页面时 Streamlit 运行的代码相同
+  （含数据加载与渲染）；只允许加载该页面首屏确实需要的重量级依赖
+两个阶段的耗时与 tools/import_budget.json 中的预算比较，超出预算或加载了不应加载的依赖时
+返回非零退出码。
+
+用法:
+    python tools/check_import_time.py              # 检查
+    python tools/check_import_time.py --update     # 按当前耗时重写预算（留出余量）
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "streamlit"
+BUDGET_PATH = Path(__file__).parent / "import_budget.json"
+
+PAGES = ['app.py', 'pages/2_检查开单.py', 'pages/3_检查结果.py', 'pages/4_电子病历.py']
+PHASES = {'import': 'import_check', 'first_view': '__main__'}
+# 重量级依赖：导入阶段一律不应加载，用到时再导入
+LAZY_MODULES = ('pandas', 'pyarrow', 'PIL', 'pypinyin', 'numpy')
+# 各页面首屏确实需要的重量级依赖（检验结果为 NumPy 列式表；页面3显示截图和备用表格）
+FIRST_VIEW_MODULES = {
+    'pages/3_检查结果.py': ('numpy', 'pandas', 'pyarrow', 'PIL'),
+    'pages/4_电子病历.py': ('numpy',),
+}
+# --update 时预算 = 当前中位数 × 该系数，至少 MIN_BUDGET_MS
+BUDGET_FACTOR = 2.0
+MIN_BUDGET_MS = 50
+
+# 子进程：按 run_name 执行页面，记录耗时与新加载的顶层模块
+_PROBE = """
+import json, runpy, sys, time
+sys.path.insert(0, {app_dir!r})
+import streamlit
+before = set(sys.modules)
+start = time.perf_counter()
+runpy.run_path({page!r}, run_name={run_name!r})
+elapsed = (time.perf_counter() - start) * 1000
+loaded = sorted({{m.split('.')[0] for m in set(sys.modules) - before}})
+print(json.dumps({{'ms': elapsed, 'modules': loaded}}))
+"""
+
+
+def probe(page: str, phase: str) -> Dict:
+    """在新进程中冷启动执行页面（phase 见 PHASES）"""
+    code = _PROBE.format(app_dir=str(APP_DIR), page=str(APP_DIR / page), run_name=PHASES[phase])
+    result = subprocess.run([sys.executable, '-c', code], cwd=APP_DIR, capture_output=True,
+                            text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(page: str, repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for phase in PHASES:
+        runs = [probe(page, phase) for _ in range(repeat)]
+        results[phase] = {
+            'median_ms': round(statistics.median(r['ms'] for r in runs), 1),
+            'modules': runs[0]['modules'],
+        }
+    return results
+
+
+def check(results: Dict[str, Dict], budget: Dict[str, Dict]) -> List[str]:
+    """返回超出预算或加载了不应加载的依赖的问题"""
+    problems = []
+    for page, phases in results.items():
+        for phase, result in phases.items():
+            limit = budget.get(page, {}).get(phase)
+            if limit is not None and result['median_ms'] > limit:
+                problems.append(f"{page} [{phase}]: 耗时 {result['median_ms']} ms 超出预算 {limit} ms")
+            allowed = FIRST_VIEW_MODULES.get(page, ()) if phase == 'first_view' else ()
+            eager = [m for m in LAZY_MODULES if m in result['modules'] and m not in allowed]
+            if eager:
+                problems.append(f"{page} [{phase}]: 加载了 {', '.join(eager)}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查页面冷启动耗时")
+    parser.add_argument('--repeat', type=int, default=5, help="每个页面每个阶段冷启动次数，取中位数")
+    parser.add_argument('--update', action='store_true', help="按当前耗时重写预算文件")
+    args = parser.parse_args()
+
+    results = {}
+    for page in PAGES:
+        results[page] = measure(page, args.repeat)
+        print(f"{page:<24} import {results[page]['import']['median_ms']:>8.1f} ms  "
+              f"first_view {results[page]['first_view']['median_ms']:>8.1f} ms")
+
+    if args.update:
+        budget = {page: {phase: max(MIN_BUDGET_MS, round(r['median_ms'] * BUDGET_FACTOR))
+                         for phase, r in phases.items()}
+                  for page, phases in results.items()}
+        BUDGET_PATH.write_text(json.dumps(budget, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+        print(f"预算已写入 {BUDGET_PATH}")
+        return
+
+    budget = json.loads(BUDGET_PATH.read_text(encoding='utf-8')) if BUDGET_PATH.exists() else {}
+    problems = check(results, budget)
+    for problem in problems:
+        print(f"错误: {problem}", file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
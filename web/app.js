@@ -18,8 +18,24 @@ async function loadJSON(name) {
   return r.json();
 }
 
+// single hashed bundle built by tools/build_data.py; null when absent or unreachable
+const bundleMeta = () => document.querySelector('meta[name="data-bundle"]');
+async function loadBundle(url) {
+  const meta = bundleMeta();
+  url = url || (meta && meta.content);
+  if (!url) return null;
+  try {
+    const r = await fetch(url);
+    return r.ok ? r.json() : null;
+  } catch (e) {
+    return null;
+  }
+}
+
 /* ============ global state ============ */
 const DB = {};                 // loaded json
+let INDEX = null;              // precompiled search / rules indexes (bundle only)
+let HASHES = {};               // content hash of each dataset taken from the bundle
 const state = { selected: [] }; // shared order selection across pages
 
 /* ============ toast ============ */
@@ -44,6 +60,10 @@ $("#modal-mask").addEventListener("click", (e) => {
 /* ============ patient banner ============ */
 function renderPatientBanner() {
   const p = DB.patient;
+  if (!p) {   // placeholder until patient.json lands
+    $("#patient-banner").innerHTML = `<div class="patient-card"><h3>👤 患者信息加载中…</h3></div>`;
+    return;
+  }
   $("#patient-banner").innerHTML = `
     <div class="patient-card">
       <h3>👤 ${esc(p.name)}　<span style="opacity:.85;font-weight:500;font-size:1rem">${esc(p.gender)} · ${esc(p.age)}岁</span></h3>
@@ -125,8 +145,15 @@ function page2() {
 
   const renderList = () => {
     const q = search.value.trim();
-    let orders = [...DB.orders_ranked].sort((a, b) => (a.order || 999) - (b.order || 999));
-    if (q) orders = orders.filter((o) => (o.order_name || "").includes(q));
+    let orders = INDEX && INDEX.orders.sorted
+      ? INDEX.orders.sorted.map((i) => DB.orders_ranked[i])
+      : [...DB.orders_ranked].sort((a, b) => (a.order || 999) - (b.order || 999));
+    if (q) {
+      const ql = q.toLowerCase();
+      const pinyin = INDEX ? INDEX.orders.pinyin : {};
+      orders = orders.filter((o) => (o.order_name || "").includes(q) ||
+        (pinyin[o.order_name] || "").startsWith(ql));
+    }
     listWrap.innerHTML = "";
     if (!orders.length) { listWrap.appendChild(el("div", "info-box", "未找到匹配的检查项目")); return; }
     listWrap.appendChild(el("div", "h3", `检查项目列表 (${orders.length})`));
@@ -165,19 +192,30 @@ function showOrderWarnings() {
   const selected = state.selected;
   const patientText = DB.transcript.filter((m) => m.role === "病人").map((m) => m.text).join(" ");
 
-  // conflicts
+  const ri = INDEX && INDEX.rules;
+  const byIndex = (a, b) => a - b;
+
+  // conflicts: with the index, only visit groups that contain a selected item
   const conflicts = [];
-  (rules.conflicts || []).forEach((c) => {
+  const groups = ri
+    ? [...new Set(selected.flatMap((it) => ri.item_to_conflicts[it] || []))].sort(byIndex)
+    : (rules.conflicts || []).map((_, i) => i);
+  groups.forEach((i) => {
+    const c = rules.conflicts[i];
     const inGroup = (c.items || []).filter((it) => selected.includes(it));
     if (inGroup.length >= 2) conflicts.push({ group: c.group, items: inGroup });
   });
-  // missing
+  // missing: with the index, each distinct keyword is tested once
   let missing = [];
-  (rules.missing_checks || []).forEach((m) => {
-    if (!selected.includes(m.missing_item) &&
-        (m.symptom_keywords || []).some((kw) => patientText.includes(kw))) {
-      missing.push({ item: m.missing_item, priority: m.priority });
-    }
+  const triggered = ri
+    ? [...new Set(Object.keys(ri.keyword_to_missing)
+        .filter((kw) => patientText.includes(kw))
+        .flatMap((kw) => ri.keyword_to_missing[kw]))].sort(byIndex)
+    : (rules.missing_checks || []).map((_, i) => i)
+        .filter((i) => (rules.missing_checks[i].symptom_keywords || []).some((kw) => patientText.includes(kw)));
+  triggered.forEach((i) => {
+    const m = rules.missing_checks[i];
+    if (!selected.includes(m.missing_item)) missing.push({ item: m.missing_item, priority: m.priority });
   });
   const order = { "高": 1, "中": 2, "低": 3 };
   missing.sort((a, b) => (order[a.priority] || 4) - (order[b.priority] || 4));
@@ -400,18 +438,109 @@ function route() {
 window.addEventListener("hashchange", route);
 
 /* ============ boot ============ */
+const DATASETS = ["patient", "transcript", "similar_cases", "orders_ranked",
+  "order_check_rules", "sidebar_support", "abnormal_summary"];
+
+// one request per dataset; the banner paints as soon as patient.json arrives
+async function loadDatasets() {
+  let done = 0;
+  const progress = () => {
+    $("#view").innerHTML = `<div class="info-box">正在加载数据（${done}/${DATASETS.length}）…</div>`;
+  };
+  progress();
+  await Promise.all(DATASETS.map((name) => loadJSON(`${name}.json`).then((data) => {
+    setDataset(name, data);
+    done += 1;
+    if (name === "patient") renderPatientBanner();
+    if (done < DATASETS.length) progress();
+  })));
+}
+
+// replace one dataset; bundle indexes built from its old content no longer apply
+function setDataset(name, data) {
+  DB[name] = data;
+  if (!INDEX) return;
+  if (name === "orders_ranked") INDEX.orders = { ...INDEX.orders, sorted: null };  // pinyin is keyed by name
+  if (name === "order_check_rules") INDEX.rules = null;
+}
+
+function applyBundle(bundle) {
+  Object.assign(DB, bundle.datasets);
+  INDEX = bundle.indexes;
+  HASHES = { ...(bundle.hashes || {}) };
+  renderPatientBanner();
+}
+
+const rerender = () => { if (!$("#modal-mask").classList.contains("show")) route(); };
+
+/* bundle path: the cached bundle paints at once, then manifest.json (stale-while-revalidate
+ * in the service worker) is compared per dataset and only datasets whose hash changed are
+ * refetched; the service worker reports a changed manifest as dataset "manifest" */
+async function revalidateDatasets() {
+  let manifest;
+  try {
+    manifest = await loadJSON("manifest.json");
+  } catch (e) {
+    return;   // offline: keep the bundle
+  }
+  const latest = manifest.datasets || {};
+  const changed = Object.keys(HASHES).filter((name) => latest[name] && latest[name] !== HASHES[name]);
+  if (!changed.length) return;
+  await Promise.all(changed.map(async (name) => {
+    setDataset(name, await loadJSON(`${name}.json`));
+    HASHES[name] = latest[name];
+    if (name === "patient") renderPatientBanner();
+  }));
+  rerender();
+}
+
+// the cached page referenced an older bundle: switch to the rebuilt one in place
+async function applyBundleUpdate(url) {
+  const meta = bundleMeta();
+  if (meta && meta.content === url) return;
+  const bundle = await loadBundle(url);
+  if (!bundle) return;
+  if (meta) meta.content = url;
+  applyBundle(bundle);
+  rerender();
+}
+
+// service worker: cached datasets paint instantly, changed ones are pushed back here
+if ("serviceWorker" in navigator) {
+  navigator.serviceWorker.register("sw.js").catch(() => {});
+  navigator.serviceWorker.addEventListener("message", async (e) => {
+    const msg = e.data || {};
+    if (msg.type === "bundle-updated") return applyBundleUpdate(msg.url);
+    if (msg.type !== "dataset-updated") return;
+    if (msg.name === "manifest") return revalidateDatasets();
+    if (!(msg.name in DB)) return;
+    setDataset(msg.name, await loadJSON(`${msg.name}.json`));
+    if (msg.name === "patient") renderPatientBanner();
+    rerender();
+  });
+}
+
 (async function boot() {
+  buildNav();
+  renderPatientBanner();
   try {
-    const [patient, transcript, similar_cases, orders_ranked, order_check_rules, sidebar_support, abnormal_summary] =
-      await Promise.all([
-        loadJSON("patient.json"), loadJSON("transcript.json"), loadJSON("similar_cases.json"),
-        loadJSON("orders_ranked.json"), loadJSON("order_check_rules.json"),
-        loadJSON("sidebar_support.json"), loadJSON("abnormal_summary.json"),
-      ]);
-    Object.assign(DB, { patient, transcript, similar_cases, orders_ranked, order_check_rules, sidebar_support, abnormal_summary });
-    renderPatientBanner();
-    buildNav();
+    const meta = bundleMeta();
+    if (meta) {
+      // the banner needs only patient.json: paint it while the bundle is still on its way
+      loadJSON("patient.json").then((p) => {
+        if (!DB.patient) { DB.patient = p; renderPatientBanner(); }
+      }).catch(() => {});
+    }
+    const bundle = await loadBundle();
+    if (bundle) {
+      applyBundle(bundle);
+    } else {
+      await loadDatasets();
+    }
     route();
+    if (bundle) revalidateDatasets();
+    const sw = navigator.serviceWorker && navigator.serviceWorker.controller;
+    if (meta && sw) sw.postMessage({ type: "bundle-check", page: location.href.split("#")[0], url: meta.content });
   } catch (e) {
     $("#view").innerHTML = `<div class="warn-box">加载数据失败：${esc(e.message)}</div>`;
   }
@@ -0,0 +1,122 @@
+"use strict";
+
+/* Offline-first cache for the static demo.
+ *
+ * - app shell (index.html / app.js / styles.css) and per-file datasets:
+ *   stale-while-revalidate — answer from cache at once, refetch in the background,
+ *   and tell open pages which dataset changed so only that one is reloaded; when the
+ *   refetched index.html points at a new data bundle, open pages are told to load it.
+ *   data/manifest.json is one of these datasets: it carries per-dataset hashes, so a page
+ *   painted from the cached bundle refetches only the datasets whose hash changed
+ * - hashed bundles (data/bundle.<hash>.json) and images: cache-first, the name
+ *   changes whenever the content does
+ */
+
+const SHELL_CACHE = "shell-v1";
+const DATA_CACHE = "data-v1";
+const SHELL = ["./", "index.html", "app.js", "styles.css"];
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(caches.open(SHELL_CACHE).then((c) => c.addAll(SHELL)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then((keys) => Promise.all(keys
+        .filter((k) => k !== SHELL_CACHE && k !== DATA_CACHE)
+        .map((k) => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+const BUNDLE_META = /<meta name="data-bundle" content="([^"]*)"/;
+
+const isImmutable = (path) => /\/data\/bundle\.[0-9a-f]+\.json$/.test(path) || /\.(webp|png|jpe?g)$/.test(path);
+const isDataset = (path) => /\/data\/[^/]+\.json$/.test(path);
+
+async function notify(message) {
+  const clients = await self.clients.matchAll({ type: "window" });
+  clients.forEach((c) => c.postMessage(message));
+}
+
+async function cacheFirst(request) {
+  const cache = await caches.open(DATA_CACHE);
+  const hit = await cache.match(request);
+  if (hit) return hit;
+  const response = await fetch(request);
+  if (response.ok) {
+    // keep only the newest bundle
+    if (/\/data\/bundle\./.test(request.url)) {
+      (await cache.keys())
+        .filter((r) => /\/data\/bundle\./.test(r.url) && r.url !== request.url)
+        .forEach((r) => cache.delete(r));
+    }
+    cache.put(request, response.clone());
+  }
+  return response;
+}
+
+// message for open pages when a dataset's content changed
+const datasetChange = (name) => (before, after) =>
+  before !== after ? { type: "dataset-updated", name } : null;
+
+// message for open pages when a rebuilt index.html points at another bundle
+function bundleChange(before, after) {
+  const [was, now] = [before, after].map((html) => (html.match(BUNDLE_META) || [])[1]);
+  return now && was !== now ? { type: "bundle-updated", url: now } : null;
+}
+
+let pendingShell = Promise.resolve();   // latest background refetch of a page
+
+// a freshly opened page may not receive messages yet when its own refetch finishes,
+// so it asks once booted whether the cached copy of itself now names another bundle
+self.addEventListener("message", (event) => {
+  const msg = event.data || {};
+  if (msg.type !== "bundle-check") return;
+  event.waitUntil(pendingShell.then(async () => {
+    const page = await (await caches.open(SHELL_CACHE)).match(msg.page);
+    const now = page && ((await page.text()).match(BUNDLE_META) || [])[1];
+    if (now && now !== msg.url) event.source.postMessage({ type: "bundle-updated", url: now });
+  }));
+});
+
+async function staleWhileRevalidate(event, cacheName, change) {
+  const cache = await caches.open(cacheName);
+  const cached = await cache.match(event.request);
+  const refresh = fetch(event.request).then(async (response) => {
+    if (!response.ok) return response;
+    if (cached && change) {
+      const [before, after] = await Promise.all([cached.clone().text(), response.clone().text()]);
+      const message = change(before, after);
+      if (message) notify(message);
+    }
+    await cache.put(event.request, response.clone());
+    return response;
+  });
+  if (cached) {
+    const settled = refresh.catch(() => {});   // offline: keep serving the cached copy
+    if (change === bundleChange) pendingShell = settled;
+    event.waitUntil(settled);
+    return cached;
+  }
+  return refresh;
+}
+
+self.addEventListener("fetch", (event) => {
+  const { request } = event;
+  if (request.method !== "GET") return;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  if (isImmutable(url.pathname)) {
+    event.respondWith(cacheFirst(request));
+  } else if (isDataset(url.pathname)) {
+    const name = url.pathname.split("/").pop().replace(/\.json$/, "");
+    event.respondWith(staleWhileRevalidate(event, DATA_CACHE, datasetChange(name)));
+  } else if (request.mode === "navigate") {
+    event.respondWith(staleWhileRevalidate(event, SHELL_CACHE, bundleChange));
+  } else if (SHELL.some((p) => url.pathname.endsWith(p))) {
+    event.respondWith(staleWhileRevalidate(event, SHELL_CACHE, null));
+  }
+});